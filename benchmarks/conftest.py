@@ -0,0 +1,55 @@
+"""Fixtures shared by the benchmarks."""
+
+import random
+import tracemalloc
+
+import pytest
+
+from .corpora import CORPUS_SIZE, FORMATS, generate_corpus
+
+
+@pytest.fixture(params=sorted(FORMATS))
+def format_name(request):
+    """Name of the format to benchmark with."""
+    return request.param
+
+
+@pytest.fixture
+def fmt(format_name):
+    """Format string to benchmark with."""
+    return FORMATS[format_name]
+
+
+@pytest.fixture
+def corpus(format_name):
+    """File names matching the format."""
+    return list(generate_corpus(format_name))
+
+
+@pytest.fixture
+def mixed_corpus():
+    """File names of all the formats, shuffled, as found in a directory of mixed products."""
+    corpus = [filename for name in sorted(FORMATS) for filename in generate_corpus(name, CORPUS_SIZE // len(FORMATS))]
+    random.Random(1).shuffle(corpus)
+    return corpus
+
+
+@pytest.fixture
+def record_peak_memory(benchmark):
+    """Record the peak memory allocated by a call in the extra information of the benchmark.
+
+    The call is made once outside of the timed rounds, as tracing the
+    allocations slows everything down.
+
+    """
+
+    def _record_peak_memory(func, *args, **kwargs):
+        tracemalloc.start()
+        try:
+            func(*args, **kwargs)
+            _current, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        benchmark.extra_info["peak_memory_bytes"] = peak
+
+    return _record_peak_memory
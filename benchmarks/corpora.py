@@ -0,0 +1,61 @@
+"""Realistic satellite file name corpora to benchmark with."""
+
+import datetime as dt
+import functools
+import random
+
+from trollsift import Parser
+
+HRPT_FMT = "/somedir/{directory}/hrpt_{platform:4s}{platnum:2s}_{time:%Y%m%d_%H%M}_{orbit:05d}.l1b"
+VIIRS_FMT = (
+    "SVI01_{platform_shortname}_d{start_time:%Y%m%d_t%H%M%S%f}_"
+    "e{end_time:%H%M%S%f}_b{orbit:5d}_c{creation_time:%Y%m%d%H%M%S%f}_{source}.h5"
+)
+IASI_FMT = (
+    "W_XX-EUMETSAT-{reception_location},{instrument},{long_platform_id}+{processing_location}_"
+    "C_EUMS_{processing_time:%Y%m%d%H%M%S}_IASI_PW3_02_{platform_id}_{start_time:%Y%m%d-%H%M%S}Z_"
+    "{end_time:%Y%m%d.%H%M%S}Z.hdf"
+)
+FORMATS = {"hrpt": HRPT_FMT, "viirs": VIIRS_FMT, "iasi": IASI_FMT}
+
+CORPUS_SIZE = 10000
+
+
+def generate_keyvals(name, rng):
+    """Generate random but realistic parameters to compose the format *name* with."""
+    time = dt.datetime(2014, 1, 1) + dt.timedelta(minutes=rng.randrange(5 * 365 * 24 * 60))
+    if name == "hrpt":
+        return {
+            "directory": rng.choice(["avhrr", "archive", "incoming"]),
+            "platform": "noaa",
+            "platnum": rng.choice(["15", "18", "19"]),
+            "time": time,
+            "orbit": rng.randrange(100000),
+        }
+    if name == "viirs":
+        return {
+            "platform_shortname": rng.choice(["npp", "j01"]),
+            "start_time": time,
+            "end_time": time + dt.timedelta(seconds=85, microseconds=300000),
+            "orbit": rng.randrange(100000),
+            "creation_time": time + dt.timedelta(hours=3, microseconds=rng.randrange(1000000)),
+            "source": rng.choice(["noaa_ops", "cspp_dev"]),
+        }
+    return {
+        "reception_location": "kan",
+        "instrument": "iasi",
+        "long_platform_id": rng.choice(["metopb", "metopc"]),
+        "processing_location": "kan",
+        "processing_time": time + dt.timedelta(minutes=13),
+        "platform_id": rng.choice(["M01", "M03"]),
+        "start_time": time,
+        "end_time": time + dt.timedelta(minutes=3),
+    }
+
+
+@functools.lru_cache()
+def generate_corpus(name, size=CORPUS_SIZE, seed=0):
+    """Generate *size* file names matching the format *name*, the same ones for a given *seed*."""
+    rng = random.Random(seed)
+    parser = Parser(FORMATS[name])
+    return tuple(parser.compose(generate_keyvals(name, rng)) for _ in range(size))
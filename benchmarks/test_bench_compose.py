@@ -0,0 +1,50 @@
+"""Benchmarks of composing."""
+
+import datetime as dt
+import random
+
+from trollsift import Parser, compose, purge
+
+from .corpora import HRPT_FMT, generate_keyvals
+
+
+def test_compose(benchmark, fmt, format_name):
+    """Latency of composing a string with a parser, the format being compiled."""
+    parser = Parser(fmt)
+    keyvals = generate_keyvals(format_name, random.Random(0))
+    parser.compose(keyvals)
+    benchmark(parser.compose, keyvals)
+
+
+def test_compose_cold(benchmark, fmt, format_name):
+    """Latency of composing a string with a format never seen before."""
+    keyvals = generate_keyvals(format_name, random.Random(0))
+    benchmark.pedantic(compose, args=(fmt, keyvals), setup=purge, rounds=200)
+
+
+def test_compose_partial(benchmark):
+    """Latency of composing only some of the fields, e.g. to make directory templates."""
+    keyvals = {"directory": "avhrr", "platform": "noaa", "platnum": "19"}
+    compose(HRPT_FMT, keyvals, allow_partial=True)
+    benchmark(compose, HRPT_FMT, keyvals, allow_partial=True)
+
+
+def test_compose_range(benchmark, record_peak_memory):
+    """Throughput of composing the expected file names of 10 days of data of 3 platforms."""
+    parser = Parser(HRPT_FMT)
+
+    def _compose_range():
+        return list(
+            parser.compose_range(
+                "time",
+                dt.datetime(2014, 2, 10),
+                dt.datetime(2014, 2, 20),
+                dt.timedelta(minutes=5),
+                values={"platnum": ["15", "18", "19"]},
+                keyvals={"directory": "avhrr", "platform": "noaa", "orbit": 0},
+            )
+        )
+
+    benchmark.extra_info["strings"] = len(_compose_range())
+    record_peak_memory(_compose_range)
+    benchmark(_compose_range)
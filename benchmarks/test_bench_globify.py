@@ -0,0 +1,21 @@
+"""Benchmarks of making glob patterns."""
+
+import datetime as dt
+
+import pytest
+
+from trollsift import globify
+
+from .corpora import HRPT_FMT
+
+
+@pytest.mark.parametrize("char_classes", [False, True])
+def test_globify(benchmark, fmt, char_classes):
+    """Latency of making a glob pattern without known parameters."""
+    benchmark(globify, fmt, char_classes=char_classes)
+
+
+def test_globify_partial_datetime(benchmark):
+    """Latency of making a glob pattern for the files of a given day."""
+    keyvals = {"platform": "noaa", "time": (dt.datetime(2014, 2, 10), "Ymd")}
+    benchmark(globify, HRPT_FMT, keyvals)
@@ -0,0 +1,25 @@
+"""Benchmarks of selecting file names from an index of their parsed values."""
+
+import datetime as dt
+
+from trollsift import FileIndex, Parser
+
+from .corpora import HRPT_FMT, generate_corpus
+
+
+def test_index(benchmark, record_peak_memory):
+    """Throughput of parsing the file names into an index."""
+    corpus = list(generate_corpus("hrpt"))
+    parser = Parser(HRPT_FMT)
+    benchmark.extra_info["strings"] = len(corpus)
+    record_peak_memory(FileIndex, parser, corpus)
+    benchmark(FileIndex, parser, corpus)
+
+
+def test_index_select(benchmark):
+    """Latency of selecting the file names of a platform in a time window of an hour."""
+    index = FileIndex(Parser(HRPT_FMT), generate_corpus("hrpt"))
+    start = dt.datetime(2016, 6, 1, 12)
+    keyvals = {"platnum": "19", "time": (start, start + dt.timedelta(hours=1))}
+    index.select(keyvals)
+    benchmark(index.select, keyvals)
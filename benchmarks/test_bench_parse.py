@@ -0,0 +1,58 @@
+"""Benchmarks of parsing."""
+
+from trollsift import Parser, PatternSet, parse, parse_many, purge
+
+from .corpora import FORMATS
+
+
+def test_parse(benchmark, fmt, corpus):
+    """Latency of parsing a string with a parser, the format being compiled."""
+    parser = Parser(fmt)
+    parser.parse(corpus[0])
+    benchmark(parser.parse, corpus[0])
+
+
+def test_parse_function(benchmark, fmt, corpus):
+    """Latency of the standalone parse function, the format being in the registry."""
+    parse(fmt, corpus[0])
+    benchmark(parse, fmt, corpus[0])
+
+
+def test_parse_cold(benchmark, fmt, corpus):
+    """Latency of parsing a string with a format never seen before."""
+    benchmark.pedantic(parse, args=(fmt, corpus[0]), setup=purge, rounds=200)
+
+
+def test_parse_many(benchmark, fmt, corpus, record_peak_memory):
+    """Throughput of parsing many strings."""
+    benchmark.extra_info["strings"] = len(corpus)
+    record_peak_memory(parse_many, fmt, corpus)
+    benchmark(parse_many, fmt, corpus)
+
+
+def test_parse_columns(benchmark, fmt, corpus, record_peak_memory):
+    """Throughput of parsing many strings into columns."""
+    parser = Parser(fmt)
+    benchmark.extra_info["strings"] = len(corpus)
+    record_peak_memory(parser.parse_columns, corpus)
+    benchmark(parser.parse_columns, corpus)
+
+
+def test_parse_many_records(benchmark, fmt, corpus, record_peak_memory):
+    """Throughput of parsing many strings into records instead of dictionaries."""
+    parser = Parser(fmt)
+    benchmark.extra_info["strings"] = len(corpus)
+    record_peak_memory(parser.parse_many, corpus, as_record=True)
+    benchmark(parser.parse_many, corpus, as_record=True)
+
+
+def test_pattern_set_match(benchmark, mixed_corpus, record_peak_memory):
+    """Throughput of finding the format of strings of several formats."""
+    patterns = PatternSet(FORMATS.values())
+
+    def _match_all():
+        return [patterns.match(stri) for stri in mixed_corpus]
+
+    benchmark.extra_info["strings"] = len(mixed_corpus)
+    record_peak_memory(_match_all)
+    benchmark(_match_all)
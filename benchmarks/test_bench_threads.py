@@ -0,0 +1,53 @@
+"""Benchmarks of parsing from several threads.
+
+On free-threaded builds of Python, the throughput should grow with the number
+of threads (up to the number of CPUs). With the GIL, it shows the overhead of
+sharing parsers between threads.
+"""
+
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from trollsift import Parser, parse
+
+THREADS = [1, 2, 4, 8]
+
+
+def _map_in_threads(executor, nthreads, func, strings):
+    """Call *func* on the strings split in *nthreads* chunks, each in a thread."""
+    chunks = [strings[i::nthreads] for i in range(nthreads)]
+    return [result for results in executor.map(func, chunks) for result in results]
+
+
+@pytest.fixture(params=THREADS)
+def nthreads(request, benchmark):
+    """Number of threads to use, also stored in the extra information of the benchmark."""
+    benchmark.extra_info["threads"] = request.param
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", lambda: True)
+    benchmark.extra_info["gil"] = is_gil_enabled()
+    return request.param
+
+
+def test_parse_threads(benchmark, fmt, corpus, nthreads):
+    """Throughput of parsing many strings with a parser shared by several threads."""
+    parser = Parser(fmt)
+
+    def _parse_chunk(strings):
+        return [parser.parse(stri) for stri in strings]
+
+    benchmark.extra_info["strings"] = len(corpus)
+    with ThreadPoolExecutor(nthreads) as executor:
+        benchmark(_map_in_threads, executor, nthreads, _parse_chunk, corpus)
+
+
+def test_parse_function_threads(benchmark, fmt, corpus, nthreads):
+    """Throughput of parsing many strings with the standalone function, from several threads."""
+
+    def _parse_chunk(strings):
+        return [parse(fmt, stri) for stri in strings]
+
+    benchmark.extra_info["strings"] = len(corpus)
+    with ThreadPoolExecutor(nthreads) as executor:
+        benchmark(_map_in_threads, executor, nthreads, _parse_chunk, corpus)
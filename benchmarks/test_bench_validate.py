@@ -0,0 +1,31 @@
+"""Benchmarks of validating strings and checking formats."""
+
+from trollsift import Parser, validate, validate_many
+from trollsift.parser import is_one2one
+
+from .corpora import HRPT_FMT
+
+
+def test_validate(benchmark, fmt, corpus):
+    """Latency of validating a matching string with a parser."""
+    parser = Parser(fmt)
+    parser.validate(corpus[0])
+    benchmark(parser.validate, corpus[0])
+
+
+def test_validate_not_matching(benchmark, fmt):
+    """Latency of validating a string of another product."""
+    validate(fmt, "README.txt")
+    benchmark(validate, fmt, "README.txt")
+
+
+def test_validate_many(benchmark, mixed_corpus, record_peak_memory):
+    """Throughput of filtering the strings of one format out of strings of several formats."""
+    benchmark.extra_info["strings"] = len(mixed_corpus)
+    record_peak_memory(validate_many, HRPT_FMT, mixed_corpus)
+    benchmark(validate_many, HRPT_FMT, mixed_corpus)
+
+
+def test_is_one2one(benchmark, fmt):
+    """Latency of checking that a format can be parsed back to the values it was composed with."""
+    benchmark(is_one2one, fmt)
@@ -1,4 +1,19 @@
-from .parser import Parser, StringFormatter, parse, compose, globify, purge, validate
+from .parser import (
+    Parser,
+    PatternSet,
+    FileIndex,
+    StringFormatter,
+    parse,
+    parse_many,
+    compose,
+    globify,
+    purge,
+    validate,
+    validate_many,
+    enable_stats,
+    disable_stats,
+    get_stats,
+)
 
 try:
     from trollsift.version import version as __version__  # noqa
@@ -11,10 +26,17 @@ except ModuleNotFoundError:  # pragma: no cover
 
 __all__ = [
     "Parser",
+    "PatternSet",
+    "FileIndex",
     "StringFormatter",
     "parse",
+    "parse_many",
     "compose",
     "globify",
     "purge",
     "validate",
+    "validate_many",
+    "enable_stats",
+    "disable_stats",
+    "get_stats",
 ]
@@ -3,35 +3,351 @@
 from __future__ import annotations
 
 import re
+import bisect
+import collections
+import collections.abc
 import datetime as dt
-import random
+import importlib
+import itertools
+import json
+import operator
+import os
 import string
-from functools import lru_cache
+import tempfile
+import threading
+import time
+import weakref
+from functools import cached_property, partial
 import typing
 
 if typing.TYPE_CHECKING:
     from _typeshed import StrOrLiteralStr
-    from typing import Any
-    from collections.abc import Iterable, Sequence, Mapping
+    from typing import Any, Literal
+    from collections.abc import Callable, Iterable, Iterator, Sequence, Mapping
+
+    # (literal text, field name, conversion function, formatting function) of
+    # each field, and the literal text after the last field
+    ComposePlan = tuple[tuple[tuple[str, str, Callable[[Any], Any] | None, Callable[[Any], str]], ...], str]
 
 
 class Parser:
     """Class-based interface to parsing and formatting functionality."""
 
-    def __init__(self, fmt: str):
+    def __init__(self, fmt: str, pin: bool = False):
+        """Initialize the parser.
+
+        Args:
+            fmt: Python format string to parse and compose strings with
+            pin: If True, the compiled format is never evicted from the
+                :class:`FormatRegistry` while the parser exists, so that
+                e.g. standalone :func:`parse` calls with the same format
+                don't have to compile it again.
+
+        """
         self.fmt = fmt
+        self._pinned = pin
+        if pin:
+            format_registry.pin(fmt)
+            weakref.finalize(self, format_registry.unpin, fmt)
 
     def __str__(self):
         return self.fmt
 
+    def __reduce__(self) -> tuple[Any, ...]:
+        # Only the format is pickled, the parser is compiled again when first
+        # used, at most once per process thanks to the format registry.
+        return self.__class__, (self.fmt, self._pinned) if self._pinned else (self.fmt,)
+
+    @cached_property
+    def _compiled(self) -> _CompiledFormat:
+        # Compiled on first use rather than here so that compose-only format
+        # strings (e.g. using ``!l`` conversions) can still be used.
+        return _compile_format(self.fmt)
+
     def keys(self):
         """Get parameter names defined in the format string."""
-        convert_dict = get_convert_dict(self.fmt)
-        return convert_dict.keys()
+        return self._compiled.convert_dict.keys()
+
+    @property
+    def stats(self) -> FormatStats | None:
+        """Statistics of the parsing of strings with the parser's format, if collected (see :func:`enable_stats`)."""
+        with _stats_lock:
+            stats = _collected_stats.get(self.fmt)
+            return None if stats is None else stats.copy()
+
+    @typing.overload
+    def parse(
+        self, stri: str | bytes, full_match: bool = True, as_record: Literal[False] = False
+    ) -> dict[str, Any]: ...
+
+    @typing.overload
+    def parse(self, stri: str | bytes, full_match: bool = True, *, as_record: Literal[True]) -> ParsedRecord: ...
+
+    def parse(self, stri: str | bytes, full_match: bool = True, as_record: bool = False) -> Any:
+        """Parse keys and values from ``stri`` using parser's format.
+
+        ``stri`` can also be bytes, e.g. a file name listed with
+        ``os.scandir(bytes_path)``, see :func:`parse`.
+
+        If ``as_record`` is True, the values are returned as a
+        :class:`ParsedRecord`, with the values as attributes, instead of a
+        dictionary. Records are read-only mappings too, and take less than
+        half the memory of dictionaries, e.g. to hold the results of millions
+        of strings.
+
+        """
+        keyvals = self._compiled.parse(stri, full_match=full_match)
+        if as_record:
+            return self._compiled.record_type._from_keyvals(keyvals)
+        return keyvals
+
+    @typing.overload
+    def parse_iter(
+        self,
+        strings: Iterable[str | bytes],
+        full_match: bool = True,
+        skip_unmatched: bool = False,
+        as_record: Literal[False] = False,
+    ) -> Iterator[dict[str, Any] | None]: ...
+
+    @typing.overload
+    def parse_iter(
+        self,
+        strings: Iterable[str | bytes],
+        full_match: bool = True,
+        skip_unmatched: bool = False,
+        *,
+        as_record: Literal[True],
+    ) -> Iterator[ParsedRecord | None]: ...
+
+    def parse_iter(
+        self,
+        strings: Iterable[str | bytes],
+        full_match: bool = True,
+        skip_unmatched: bool = False,
+        as_record: bool = False,
+    ) -> Iterator[Any]:
+        """Lazily parse keys and values from each string of ``strings`` using parser's format.
+
+        Args:
+            strings: Strings to extract information from, possibly bytes
+                (see :func:`parse`)
+            full_match: Force the match of the whole strings. Default True.
+            skip_unmatched: If True, strings not matching the format are left
+                out of the results. Otherwise (the default) ``None`` is
+                produced for them, so results stay aligned with ``strings``.
+            as_record: If True, produce :class:`ParsedRecord` instances
+                instead of dictionaries (see :meth:`parse`).
+
+        Yields:
+            The parsed keys and values of each string, in order.
+
+        """
+        results = self._compiled.parse_iter(strings, full_match=full_match, skip_unmatched=skip_unmatched)
+        return _to_records(self._compiled, results) if as_record else results
+
+    @typing.overload
+    def parse_many(
+        self,
+        strings: Iterable[str | bytes],
+        full_match: bool = True,
+        skip_unmatched: bool = False,
+        workers: int | None = 1,
+        chunksize: int = 10000,
+        as_record: Literal[False] = False,
+    ) -> list[dict[str, Any] | None]: ...
+
+    @typing.overload
+    def parse_many(
+        self,
+        strings: Iterable[str | bytes],
+        full_match: bool = True,
+        skip_unmatched: bool = False,
+        workers: int | None = 1,
+        chunksize: int = 10000,
+        *,
+        as_record: Literal[True],
+    ) -> list[ParsedRecord | None]: ...
+
+    def parse_many(
+        self,
+        strings: Iterable[str | bytes],
+        full_match: bool = True,
+        skip_unmatched: bool = False,
+        workers: int | None = 1,
+        chunksize: int = 10000,
+        as_record: bool = False,
+    ) -> list[Any]:
+        """Parse keys and values from each string of ``strings`` using parser's format.
+
+        Same as :meth:`parse_iter`, but returns all results at once as a list,
+        optionally parsing in several processes. See :func:`parse_many`.
+
+        """
+        if workers == 1:
+            results: Iterable[dict[str, Any] | None] = self._compiled.parse_iter(
+                strings, full_match=full_match, skip_unmatched=skip_unmatched
+            )
+        else:
+            # records are made here, pickling them would send their format with each of them
+            results = _parse_in_processes(self.fmt, strings, full_match, skip_unmatched, workers, chunksize)
+        return list(_to_records(self._compiled, results) if as_record else results)
+
+    def parse_columns(
+        self, strings: Iterable[str | bytes], full_match: bool = True, strings_key: str | None = None
+    ) -> dict[str, Any]:
+        """Parse keys and values from ``strings`` into one column of values per key.
+
+        This is a more compact alternative to :meth:`parse_many` for large
+        numbers of strings. Strings not matching the format are left out. If
+        NumPy is installed, the columns are NumPy arrays: datetime fields
+        become ``datetime64[us]`` arrays, integer and float fields 64 bits
+        numeric arrays and string fields unicode arrays. Without NumPy, the
+        columns are lists.
+
+        Args:
+            strings: Strings to extract information from, possibly bytes
+                (see :func:`parse`)
+            full_match: Force the match of the whole strings. Default True.
+            strings_key: If given, the matching strings themselves are added
+                as an extra column with this name, of bytes if the strings
+                are bytes.
 
-    def parse(self, stri: str, full_match: bool = True) -> dict[str, Any]:
-        """Parse keys and values from ``stri`` using parser's format."""
-        return parse(self.fmt, stri, full_match=full_match)
+        Returns:
+            A dictionary with a column of parsed values for each key of the
+            format.
+
+        """
+        field_types = dict(self._compiled.field_types)
+        if strings_key is not None and strings_key in field_types:
+            raise ValueError(f"Key {strings_key!r} is already used in the format")
+        matched, columns = _parse_to_columns(self._compiled, strings, full_match=full_match)
+        if strings_key is not None:
+            columns[strings_key] = matched
+            field_types[strings_key] = bytes if matched and isinstance(matched[0], bytes) else str
+        np = _get_numpy()
+        if np is None:
+            return columns
+        return {key: _to_array(np, column, field_types[key]) for key, column in columns.items()}
+
+    @typing.overload
+    def scan(self, root: str = "", recursive: bool = True) -> Iterator[tuple[str, dict[str, Any]]]: ...
+
+    @typing.overload
+    def scan(self, root: bytes, recursive: bool = True) -> Iterator[tuple[bytes, dict[str, Any]]]: ...
+
+    def scan(self, root: Any = "", recursive: bool = True) -> Iterator[tuple[Any, dict[str, Any]]]:
+        """Find the files and directories under ``root`` matching the parser's format.
+
+        This is a single pass alternative to parsing the results of
+        ``glob.glob(parser.globify())``: the directory tree is walked with
+        :func:`os.scandir` and each entry is matched and parsed as it is
+        found, without building the list of all the paths first.
+
+        If the format contains a path separator, the paths of the entries
+        (``root`` joined with the entry names, as glob would return them) are
+        matched against it. Otherwise, only the names of the entries are.
+
+        Args:
+            root: Directory to scan. Defaults to the current directory, in
+                which case the paths returned are relative to it. If bytes,
+                the directories are listed and the paths returned as bytes,
+                e.g. for names that can't be decoded (see :func:`parse`).
+            recursive: Whether to also scan the subdirectories of ``root``
+                (the default) or not.
+
+        Yields:
+            The path of each matching entry with the keys and values parsed
+            from it.
+
+        """
+        compiled = self._compiled
+        match_paths = os.sep in self.fmt or (os.altsep is not None and os.altsep in self.fmt)
+        curdir = os.fsencode(os.curdir) if isinstance(root, bytes) else os.curdir
+        directories = [root]
+        while directories:
+            directory = directories.pop()
+            try:
+                entries = os.scandir(directory or curdir)
+            except OSError:
+                # e.g. no permission to read it, or removed since listed
+                continue
+            subdirectories = []
+            with entries:
+                for entry in entries:
+                    path = os.path.join(directory, entry.name) if directory else entry.name
+                    keyvals = compiled.try_parse(path if match_paths else entry.name)
+                    if keyvals is not None:
+                        yield path, keyvals
+                    if recursive and entry.is_dir(follow_symlinks=False):
+                        subdirectories.append(path)
+            directories.extend(reversed(subdirectories))
+
+    def walk(self, keyvals: Mapping[str, Any] | None = None, root: str = "") -> Iterator[tuple[str, dict[str, Any]]]:
+        """Find the paths matching the parser's format, walking only the directories that can match.
+
+        The format is split into path components, e.g.
+        ``"/data/{platform}/{start_time:%Y}/{start_time:%j}/hrpt_{start_time:%H%M}.l1b"``
+        into ``"data"``, ``"{platform}"``, ``"{start_time:%Y}"``... The
+        parameters given in ``keyvals`` are composed into the components
+        first, so with e.g. a ``platform`` only the directories and files of
+        that platform are read. Then from the top, each directory is only
+        descended into if its name matches the corresponding component, and
+        components without fields are not listed at all.
+
+        Each field is matched within a single path component. When a
+        parameter is in several components, the values parsed from each must
+        agree, or the path is left out. The directives of a datetime
+        parameter are combined, e.g. the year and day of the year of the
+        directory names with the hour and minute of the file name.
+
+        Args:
+            keyvals: "Parameter --> parameter value" map of the known
+                parameters.
+            root: Directory a relative format is relative to. Defaults to the
+                current directory, in which case the paths returned are
+                relative too.
+
+        Yields:
+            The path of each matching entry with the keys and values parsed
+            from it, completed with the ones given in ``keyvals``.
+
+        Raises:
+            ValueError: If a field not given in ``keyvals`` may contain a path
+                separator, e.g. ``{start_time:%Y/%j}``.
+
+        """
+        keyvals = {} if keyvals is None else keyvals
+        anchor = _get_path_anchor(self.fmt)
+        if anchor:
+            # absolute path, or drive relative path on Windows
+            root = anchor
+        components = _split_path_format(self.fmt[len(anchor) :], keyvals)
+        levels = [_compile_path_component(component) for component in components if component]
+        if not levels:
+            return
+        provided = {key: value for key, value in keyvals.items() if key in self._compiled.field_roots}
+        # path, index of its level, values parsed so far and components of their datetimes
+        stack: list[tuple[str, int, dict[str, Any], dict[str, dict[str, int]]]] = [(root, 0, provided, {})]
+        while stack:
+            path, level_index, parsed, dt_parts = stack.pop()
+            level = levels[level_index]
+            is_last = level_index == len(levels) - 1
+            if isinstance(level, str):
+                path = os.path.join(path, level)
+                if not is_last:
+                    stack.append((path, level_index + 1, parsed, dt_parts))
+                elif os.path.lexists(path):
+                    yield path, parsed
+                continue
+            children = []
+            for entry, entry_parsed, entry_dt_parts in _scan_path_component(path, level, parsed, dt_parts):
+                entry_path = os.path.join(path, entry.name)
+                if is_last:
+                    yield entry_path, entry_parsed
+                elif entry.is_dir():
+                    children.append((entry_path, level_index + 1, entry_parsed, entry_dt_parts))
+            stack.extend(reversed(children))
 
     def compose(self, keyvals: Mapping[str, Any], allow_partial: bool = False) -> str:
         """Compose format string ``self.fmt`` with parameters given in the ``keyvals`` dict.
@@ -48,15 +364,154 @@ class Parser:
             extracted from the corresponding items in the *keyvals* dictionary.
 
         """
-        return compose(fmt=self.fmt, keyvals=keyvals, allow_partial=allow_partial)
+        if allow_partial:
+            return self._compiled.compose_partial(keyvals)
+        return self._compiled.compose(keyvals)
 
     format = compose
 
-    def globify(self, keyvals: Mapping[str, Any] | None = None) -> str:
-        """Generate a string usable with glob.glob() from format string."""
-        return globify(self.fmt, keyvals)
+    def compose_product(
+        self, values: Mapping[str, Iterable[Any]], keyvals: Mapping[str, Any] | None = None
+    ) -> Iterator[str]:
+        """Lazily compose the format for each combination of the given parameter values.
+
+        >>> p = Parser("{platform}_{channel}_{segment:02d}.dat")
+        >>> list(p.compose_product({"platform": ["noaa18", "noaa19"], "channel": ["ch4"], "segment": range(1, 3)}))
+        ['noaa18_ch4_01.dat', 'noaa18_ch4_02.dat', 'noaa19_ch4_01.dat', 'noaa19_ch4_02.dat']
+
+        Args:
+            values: "Parameter --> iterable of parameter values" map. The
+                first parameter changes slowest. Only the values of the first
+                parameter are iterated over lazily, the others are read once.
+            keyvals: "Parameter --> parameter value" map for the parameters
+                with a single value.
+
+        Yields:
+            The composed strings, one for each combination of the ``values``.
+
+        """
+        compiled = self._compiled
+        current_keyvals = dict(keyvals or {})
+        keys = list(values)
+        for combination in _iter_product([values[key] for key in keys]):
+            current_keyvals.update(zip(keys, combination))
+            yield compiled.compose(current_keyvals)
+
+    def compose_range(
+        self,
+        key: str,
+        start: dt.datetime,
+        end: dt.datetime,
+        step: dt.timedelta,
+        values: Mapping[str, Iterable[Any]] | None = None,
+        keyvals: Mapping[str, Any] | None = None,
+    ) -> Iterator[str]:
+        """Lazily compose the format for a range of times.
+
+        >>> p = Parser("{platform}_{start_time:%Y%m%d_%H%M}.dat")
+        >>> list(p.compose_range("start_time", dt.datetime(2014, 2, 10, 10), dt.datetime(2014, 2, 10, 11),
+        ...                      dt.timedelta(minutes=20), keyvals={"platform": "noaa19"}))
+        ['noaa19_20140210_1000.dat', 'noaa19_20140210_1020.dat', 'noaa19_20140210_1040.dat']
+
+        Args:
+            key: Name of the time parameter
+            start: First time of the range
+            end: End of the range (excluded)
+            step: Time between two consecutive times of the range
+            values: "Parameter --> iterable of parameter values" map of other
+                parameters to compose all the combinations of for each time,
+                as in :meth:`compose_product`.
+            keyvals: "Parameter --> parameter value" map for the parameters
+                with a single value.
+
+        Yields:
+            The composed strings, in time order.
+
+        """
+        if step <= dt.timedelta(0):
+            raise ValueError(f"The time step must be positive, got {step}")
+        return self.compose_product({key: _time_range(start, end, step), **(values or {})}, keyvals=keyvals)
 
-    def validate(self, stri: str) -> bool:
+    def globify(self, keyvals: Mapping[str, Any] | None = None, char_classes: bool = False) -> str:
+        """Generate a string usable with glob.glob() from format string.
+
+        See :func:`globify` for the arguments.
+
+        """
+        return globify(self.fmt, keyvals, char_classes=char_classes)
+
+    def globify_window(
+        self,
+        key: str,
+        start: dt.datetime,
+        end: dt.datetime,
+        keyvals: Mapping[str, Any] | None = None,
+        resolution: str = "H",
+        char_classes: bool = False,
+    ) -> list[str]:
+        """Generate glob patterns matching the strings of a time window.
+
+        The window is split into periods as long as possible: whole years,
+        months, days, hours..., down to the given ``resolution``. A pattern
+        is made for each period, with the directives of the time parameter
+        known from it filled in, as with a ``(datetime, directives)`` tuple
+        in :func:`globify`:
+
+        >>> p = Parser("hrpt_{platform}_{time:%Y%m%d_%H%M}.l1b")
+        >>> start, end = dt.datetime(2014, 2, 9, 22), dt.datetime(2014, 2, 11, 1, 30)
+        >>> p.globify_window("time", start, end)  # doctest: +NORMALIZE_WHITESPACE
+        ['hrpt_*_20140209_22??.l1b', 'hrpt_*_20140209_23??.l1b', 'hrpt_*_20140210_????.l1b',
+         'hrpt_*_20140211_00??.l1b', 'hrpt_*_20140211_01??.l1b']
+
+        The window is widened to whole periods of the resolution, here to
+        02:00, so the patterns can also match strings of times just before
+        or after the window. Only the periods the format has directives for
+        are used, e.g. no months if the date is given by the day of the year
+        (``%j``).
+
+        Args:
+            key: Name of the time parameter
+            start: Start of the window
+            end: End of the window (excluded)
+            keyvals: "Parameter --> parameter value" map of the other known
+                parameters.
+            resolution: Directive of the shortest periods to split the window
+                into, one of ``Y``, ``m``, ``d``, ``H`` (the default), ``M``
+                and ``S``. The finer, the more patterns.
+            char_classes: If True, use character classes (e.g. ``[0-9]``)
+                for the unknown characters, see :func:`globify`.
+
+        Returns:
+            The patterns, in time order, without duplicates.
+
+        Raises:
+            ValueError: If ``key`` is not a time parameter of the format or
+                ``resolution`` is not a valid directive.
+
+        """
+        resolution_letters = [letters[0] for letters in DT_RESOLUTIONS]
+        if resolution not in resolution_letters:
+            raise ValueError(f"Invalid resolution {resolution!r}, must be one of {', '.join(resolution_letters)}")
+        directives = "".join(
+            format_spec
+            for _, field_name, format_spec, _ in formatter.parse(self.fmt)
+            if field_name == key and format_spec is not None
+        )
+        resolutions = [
+            letters
+            for letters in DT_RESOLUTIONS[: resolution_letters.index(resolution) + 1]
+            if any("%" + letter in directives for letter in letters)
+        ]
+        if not resolutions:
+            raise ValueError(f"Key {key!r} is not a time parameter of the format {self.fmt!r}")
+        keyvals = dict(keyvals or {})
+        patterns: dict[str, None] = {}
+        for time, letters in _split_time_window(start, end, resolutions):
+            keyvals[key] = (time, letters)
+            patterns[globify(self.fmt, keyvals, char_classes=char_classes)] = None
+        return list(patterns)
+
+    def validate(self, stri: str | bytes) -> bool:
         """Validate that string ``stri`` conforms to the parser's format definition.
 
         Checks that the provided string is parsable and therefore complies with
@@ -64,7 +519,24 @@ class Parser:
         or to check if a string is compatible before passing it to the
         parser function.
         """
-        return validate(self.fmt, stri)
+        return self._compiled.validate(stri)
+
+    def validate_many(self, strings: Iterable[str | bytes]) -> Any:
+        """Validate that each string of ``strings`` conforms to the parser's format definition.
+
+        Same as :meth:`validate` for many strings, compiling the format only
+        once. Values are only converted for the fields the regular expression
+        can't fully check, e.g. numbers with fill characters or datetimes.
+
+        Args:
+            strings: Strings to validate, possibly bytes (see :func:`parse`)
+
+        Returns:
+            A boolean NumPy array if NumPy is installed, a list of booleans
+            otherwise. Usable as a mask to filter the strings with.
+
+        """
+        return _to_mask(self._compiled.validate_iter(strings))
 
     def is_one2one(self):
         """Check if this parser's format string has a one to one correspondence.
@@ -84,6 +556,344 @@ class Parser:
         return is_one2one(self.fmt)
 
 
+def _iter_product(iterables: Sequence[Iterable[Any]]) -> Iterator[tuple[Any, ...]]:
+    """Same as :func:`itertools.product`, but only reading the first iterable lazily."""
+    if not iterables:
+        yield ()
+        return
+    others = [tuple(iterable) for iterable in iterables[1:]]
+    for first in iterables[0]:
+        for others_combination in itertools.product(*others):
+            yield (first, *others_combination)
+
+
+def _time_range(start: dt.datetime, end: dt.datetime, step: dt.timedelta) -> Iterator[dt.datetime]:
+    time = start
+    while time < end:
+        yield time
+        time += step
+
+
+# letters of the datetime directives known from a time truncated to the
+# year, month, day, hour, minute and second, the first one naming the resolution
+DT_RESOLUTIONS = ("Yy", "mbB", "djaAwUW", "HIp", "M", "S")
+# fields of the datetimes set to their minimum to truncate to each resolution
+DT_TRUNCATED_FIELDS: dict[str, dict[str, Any]] = {
+    "Yy": {"month": 1, "day": 1, "hour": 0, "minute": 0, "second": 0, "microsecond": 0},
+    "mbB": {"day": 1, "hour": 0, "minute": 0, "second": 0, "microsecond": 0},
+    "djaAwUW": {"hour": 0, "minute": 0, "second": 0, "microsecond": 0},
+    "HIp": {"minute": 0, "second": 0, "microsecond": 0},
+    "M": {"second": 0, "microsecond": 0},
+    "S": {"microsecond": 0},
+}
+# length of the periods of the resolutions of fixed length
+DT_PERIOD_STEPS = {
+    "djaAwUW": dt.timedelta(days=1),
+    "HIp": dt.timedelta(hours=1),
+    "M": dt.timedelta(minutes=1),
+    "S": dt.timedelta(seconds=1),
+}
+
+
+def _split_time_window(
+    start: dt.datetime, end: dt.datetime, resolutions: Sequence[str]
+) -> Iterator[tuple[dt.datetime, str]]:
+    """Split the window from *start* to *end* into periods of the given *resolutions*, as long as possible.
+
+    The window is widened to whole periods of the finest resolution.
+
+    Yields:
+        The start of each period, with the letters of the datetime
+        directives known from it (those of its resolution and the coarser
+        ones).
+
+    """
+    time = start.replace(**DT_TRUNCATED_FIELDS[resolutions[-1]])
+    while time < end:
+        for resolution in resolutions:
+            period_end = _get_period_end(time, resolution)
+            if time.replace(**DT_TRUNCATED_FIELDS[resolution]) == time and period_end <= end:
+                break
+        known = DT_RESOLUTIONS[: DT_RESOLUTIONS.index(resolution) + 1]
+        yield time, "".join(known)
+        time = period_end
+
+
+def _get_period_end(time: dt.datetime, resolution: str) -> dt.datetime:
+    """Get the start of the period of *resolution* following the one *time* is in."""
+    time = time.replace(**DT_TRUNCATED_FIELDS[resolution])
+    if resolution == "Yy":
+        return time.replace(year=time.year + 1)
+    if resolution == "mbB":
+        return time.replace(year=time.year + time.month // 12, month=time.month % 12 + 1)
+    return time + DT_PERIOD_STEPS[resolution]
+
+
+class PatternSet:
+    """Set of format strings to match strings against, all at once.
+
+    Finding which format(s) a string matches doesn't require trying each
+    format in turn: the formats are grouped by the literal text they start
+    and end with, and each group is combined into a single regular
+    expression. A string is then only matched against the groups of formats
+    it can match.
+
+    >>> patterns = PatternSet(["{platform}_{time:%Y%m%d}.nc", "hrpt_{platform:4s}{platnum:2s}_{orbit:05d}.l1b"])
+    >>> patterns.match("hrpt_noaa16_69022.l1b")
+    ('hrpt_{platform:4s}{platnum:2s}_{orbit:05d}.l1b', {'platform': 'noaa', 'platnum': '16', 'orbit': 69022})
+
+    """
+
+    def __init__(self, fmts: Iterable[str]):
+        self.fmts = tuple(fmts)
+        self._compiled = [_compile_format(fmt) for fmt in self.fmts]
+        self._group_names = []
+        # formats with several fields of unspecified width, matched on their own (see _SegmentPattern)
+        self._segment_indices = []
+        regexes_by_affixes: dict[tuple[str, str], dict[int, str]] = {}
+        for index, (fmt, compiled) in enumerate(zip(self.fmts, self._compiled)):
+            if isinstance(compiled.pattern, _SegmentPattern):
+                self._group_names.append(tuple((name, name) for name in compiled.pattern.groupindex))
+                self._segment_indices.append(index)
+                continue
+            group_prefix = "f{:d}_".format(index)
+            self._group_names.append(tuple((name, group_prefix + name) for name in compiled.pattern.groupindex))
+            affixes = _get_literal_affixes(fmt)
+            regexes_by_affixes.setdefault(affixes, {})[index] = _prefix_group_names(compiled.regex, group_prefix)
+        # {(prefix length, suffix length): {(prefix, suffix): (first match pattern, all matches pattern)}}
+        self._patterns: dict[tuple[int, int], dict[tuple[str, str], tuple[re.Pattern[str], re.Pattern[str]]]] = {}
+        for (prefix, suffix), regexes in regexes_by_affixes.items():
+            first_match_regex = "|".join("(?P<p{:d}>{})".format(index, regex) for index, regex in regexes.items())
+            all_matches_regex = "".join(
+                "(?:(?=(?P<p{:d}>{})$))?".format(index, regex) for index, regex in regexes.items()
+            )
+            self._patterns.setdefault((len(prefix), len(suffix)), {})[prefix, suffix] = (
+                re.compile("^(?:" + first_match_regex + ")$"),
+                re.compile("^" + all_matches_regex),
+            )
+
+    def __len__(self) -> int:
+        return len(self.fmts)
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        return self.__class__, (self.fmts,)
+
+    def _candidate_patterns(self, stri: str) -> Iterator[tuple[re.Pattern[str], re.Pattern[str]]]:
+        # "$" also matches before a newline at the end of the string
+        end = len(stri) - 1 if stri.endswith("\n") else len(stri)
+        for (prefix_length, suffix_length), patterns in self._patterns.items():
+            candidate = patterns.get((stri[:prefix_length], stri[end - suffix_length : end]))
+            if candidate is not None:
+                yield candidate
+
+    def match(self, stri: str) -> tuple[str, dict[str, Any]] | None:
+        """Find the first format matching ``stri``.
+
+        Returns:
+            The first format (in the order given) that ``stri`` matches, with
+            the keys and values parsed from ``stri``. ``None`` if no format
+            matches.
+
+        """
+        matches: list[tuple[int, re.Match[str] | _SegmentMatch]] = []
+        for first_match_pattern, _all_matches_pattern in self._candidate_patterns(stri):
+            match = first_match_pattern.match(stri)
+            if match is not None:
+                # the group of the matching format is the last one to be closed
+                matches.append((int(typing.cast(str, match.lastgroup)[1:]), match))
+        for index in self._segment_indices:
+            segment_match = self._compiled[index].pattern.match(stri)
+            if segment_match is not None:
+                matches.append((index, segment_match))
+                break
+        if not matches:
+            return None
+        index, first_match = min(matches, key=operator.itemgetter(0))
+        try:
+            return self.fmts[index], self._get_keyvals(index, first_match)
+        except ValueError:
+            # matching, but the values can't be converted: try the next formats
+            for next_index in range(index + 1, len(self.fmts)):
+                try:
+                    return self.fmts[next_index], self._compiled[next_index].parse(stri)
+                except ValueError:
+                    continue
+        return None
+
+    def match_all(self, stri: str) -> list[tuple[str, dict[str, Any]]]:
+        """Find all the formats matching ``stri``.
+
+        Returns:
+            The formats (in the order given) that ``stri`` matches, each with
+            the keys and values parsed from ``stri``.
+
+        """
+        matches = []
+        for _first_match_pattern, all_matches_pattern in self._candidate_patterns(stri):
+            match = typing.cast(re.Match[str], all_matches_pattern.match(stri))  # all formats are optional
+            for group_name in all_matches_pattern.groupindex:
+                if group_name[0] == "p" and match.start(group_name) != -1:
+                    index = int(group_name[1:])
+                    try:
+                        matches.append((index, self._get_keyvals(index, match)))
+                    except ValueError:
+                        continue
+        for index in self._segment_indices:
+            segment_match = self._compiled[index].pattern.match(stri)
+            if segment_match is not None:
+                try:
+                    matches.append((index, self._get_keyvals(index, segment_match)))
+                except ValueError:
+                    continue
+        return [(self.fmts[index], keyvals) for index, keyvals in sorted(matches, key=operator.itemgetter(0))]
+
+    def _get_keyvals(self, index: int, match: re.Match[str] | _SegmentMatch) -> dict[str, Any]:
+        keyvals = {name: match[group_name] for name, group_name in self._group_names[index]}
+        for key, converter in self._compiled[index].converters:
+            keyvals[key] = converter(keyvals[key])
+        return keyvals
+
+
+class FileIndex:
+    """Index of the values parsed from many paths, to select paths by value without parsing them again.
+
+    The paths are parsed once into a column of values per field, as with
+    :meth:`Parser.parse_columns`. The first time a field is used in a
+    selection, the paths are sorted by its values, so that the paths with a
+    given value or in a range of values are then found by binary search
+    (with :func:`numpy.searchsorted` if NumPy is installed, :mod:`bisect`
+    otherwise).
+
+    >>> index = FileIndex(Parser("hrpt_{platform:4s}{platnum:2s}_{time:%Y%m%d_%H%M}.l1b"),
+    ...                   ["hrpt_noaa19_20140210_1004.l1b", "hrpt_noaa18_20140210_1012.l1b", "README.txt",
+    ...                    "hrpt_noaa19_20140210_1148.l1b"])
+    >>> index.select({"platnum": "19", "time": (dt.datetime(2014, 2, 10, 10), dt.datetime(2014, 2, 10, 11))})
+    ['hrpt_noaa19_20140210_1004.l1b']
+
+    Args:
+        parser: Parser of the format of the paths
+        paths: Paths to index, possibly bytes (see :func:`parse`). The ones
+            not matching the format are left out.
+        full_match: Force the match of the whole paths. Default True.
+
+    """
+
+    def __init__(self, parser: Parser, paths: Iterable[str | bytes], full_match: bool = True):
+        self.parser = parser
+        compiled = parser._compiled
+        self.paths, columns = _parse_to_columns(compiled, paths, full_match=full_match)
+        self._np = _get_numpy()
+        if self._np is None:
+            self._columns: dict[str, Any] = columns
+        else:
+            self._columns = {
+                key: _to_array(self._np, column, compiled.field_types[key]) for key, column in columns.items()
+            }
+        # values sorted, positions of the paths in that order and rank of each path, by key
+        self._sorted: dict[str, tuple[Any, Any, Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def select(self, keyvals: Mapping[str, Any]) -> list[str | bytes]:
+        """Get the paths with the given values.
+
+        Args:
+            keyvals: "Parameter --> parameter value" map of the values the
+                paths must have. A ``(start, end)`` tuple selects the values
+                from ``start`` included to ``end`` excluded, either bound
+                being optional with ``None``.
+
+        Returns:
+            The matching paths, in the order they were given in.
+
+        Raises:
+            ValueError: If a parameter is not in the format.
+
+        """
+        ranges = []
+        for key, value in keyvals.items():
+            values, order, ranks = self._get_sorted(key)
+            if isinstance(value, tuple):
+                start, end = value
+                low = 0 if start is None else self._search(values, start, "left")
+                high = len(values) if end is None else self._search(values, end, "left")
+            else:
+                low = self._search(values, value, "left")
+                high = self._search(values, value, "right")
+            ranges.append((low, high, order, ranks))
+        if not ranges:
+            return list(self.paths)
+        # start from the smallest selection, then check the ranks of its paths for the others
+        low, high, order, _ranks = min(ranges, key=lambda selection: selection[1] - selection[0])
+        positions = order[low:high]
+        np = self._np
+        for other_low, other_high, _order, ranks in ranges:
+            if np is None:
+                positions = [position for position in positions if other_low <= ranks[position] < other_high]
+            else:
+                positions_ranks = ranks[positions]
+                positions = positions[(positions_ranks >= other_low) & (positions_ranks < other_high)]
+        positions = sorted(positions) if np is None else np.sort(positions).tolist()
+        return [self.paths[position] for position in positions]
+
+    def _get_sorted(self, key: str) -> tuple[Any, Any, Any]:
+        sorted_column = self._sorted.get(key)
+        if sorted_column is not None:
+            return sorted_column
+        column = self._columns.get(key)
+        if column is None:
+            raise ValueError(f"Key {key!r} is not in the format {self.parser.fmt!r}")
+        np = self._np
+        if np is None:
+            order = sorted(range(len(column)), key=column.__getitem__)
+            ranks = [0] * len(order)
+            for rank, position in enumerate(order):
+                ranks[position] = rank
+            sorted_column = [column[position] for position in order], order, ranks
+        else:
+            order = np.argsort(column, kind="stable")
+            ranks = np.empty_like(order)
+            ranks[order] = np.arange(len(order))
+            sorted_column = column[order], order, ranks
+        self._sorted[key] = sorted_column
+        return sorted_column
+
+    def _search(self, values: Any, value: Any, side: str) -> int:
+        """Get the position of *value* in the sorted *values*, before (left) or after (right) the equal ones."""
+        np = self._np
+        if np is not None:
+            if values.dtype.kind == "M":
+                # searching a datetime object would convert the whole array to objects
+                value = np.datetime64(value)
+            return int(np.searchsorted(values, value, side=side))
+        if side == "left":
+            return bisect.bisect_left(values, value)
+        return bisect.bisect_right(values, value)
+
+
+def _get_literal_affixes(fmt: str) -> tuple[str, str]:
+    """Get the literal text at the start and at the end of *fmt*."""
+    parsed_fmt = list(formatter.parse(fmt))
+    if not parsed_fmt:
+        return "", ""
+    prefix = parsed_fmt[0][0]
+    suffix = parsed_fmt[-1][0] if parsed_fmt[-1][1] is None else ""
+    return prefix, suffix
+
+
+def _prefix_group_names(regex: str, prefix: str) -> str:
+    """Add *prefix* to the names of the named groups (and references to them) in *regex*."""
+
+    def _add_prefix(match: re.Match[str]) -> str:
+        if match.group("name") is None:
+            # escaped character
+            return match.group()
+        return match.group("start") + prefix + match.group("name")
+
+    return re.sub(r"\\.|(?P<start>\(\?P[<=])(?P<name>\w+)", _add_prefix, regex, flags=re.DOTALL)
+
+
 class StringFormatter(string.Formatter):
     """Custom string formatter class for basic strings.
 
@@ -221,19 +1031,24 @@ class RegexFormatter(string.Formatter):
 
     def __init__(self):
         # hold on to fields we've seen already so we can reuse their
-        # definitions in the regex
-        self._cached_fields = {}
-        self.format = lru_cache()(self._uncached_format)
+        # definitions in the regex, separately for each thread so that an
+        # instance can be shared
+        self._local = threading.local()
         super(RegexFormatter, self).__init__()
 
-    def _uncached_format(*args, **kwargs):
+    @property
+    def _cached_fields(self) -> dict[str, str]:
+        try:
+            return self._local.cached_fields
+        except AttributeError:
+            self._local.cached_fields = {}
+            return self._local.cached_fields
+
+    def format(self, format_string: str, /, *args: Any, **kwargs: Any) -> str:
         try:
-            # super() doesn't seem to work here
-            ret_val = string.Formatter.format(*args, **kwargs)
+            return super(RegexFormatter, self).format(format_string, *args, **kwargs)
         finally:
-            self = args[0]  # just matching the parent class
             self._cached_fields.clear()
-        return ret_val
 
     def _escape(self, s: str) -> str:
         """Escape bad characters for regular expressions.
@@ -307,6 +1122,9 @@ class RegexFormatter(string.Formatter):
         return self.regex_field(field_name, value, format_spec)
 
 
+regex_formatter = RegexFormatter()
+
+
 def format_spec_to_regex(field_name: str, format_spec: str) -> str:
     """Make an attempt at converting a format spec to a regular expression."""
     # NOTE: remove escaped backslashes so regex matches
@@ -353,11 +1171,9 @@ def _get_fill(fill: str | None, width: str | None, ftype: str | None) -> str | N
     return fill
 
 
-@lru_cache()
 def regex_format(fmt: str) -> str:
-    # We create a new instance of RegexFormatter here to prevent concurrent calls to
-    # format interfering with one another.
-    return RegexFormatter().format(fmt)
+    """Convert the format string *fmt* to a regular expression (see :class:`RegexFormatter`)."""
+    return _compile_format(fmt).regex
 
 
 def extract_values(fmt: str, stri: str, full_match: bool = True) -> dict[str, Any]:
@@ -369,13 +1185,7 @@ def extract_values(fmt: str, stri: str, full_match: bool = True) -> dict[str, An
         full_match: Force the match of the whole string. Default
             to ``True``.
     """
-    regex = regex_format(fmt)
-    if full_match:
-        regex = "^" + regex + "$"
-    match = re.match(regex, stri)
-    if match is None:
-        raise ValueError("String does not match pattern.")
-    return match.groupdict()
+    return _compile_format(fmt).match(stri, full_match=full_match).groupdict()
 
 
 def _get_number_from_fmt(fmt: str) -> int:
@@ -398,23 +1208,261 @@ def _get_number_from_fmt(fmt: str) -> int:
 
 def _convert(convdef: str, stri: str) -> Any:
     """Convert the string *stri* to the given conversion definition *convdef*."""
-    result: Any  # force mypy type
+    converter = _get_converter(convdef)
+    if converter is None:
+        return stri
+    return converter(stri)
+
+
+def _get_converter(convdef: str, matched: bool = False) -> Callable[[str], Any] | None:
+    """Get a function converting matched strings to the given conversion definition *convdef*.
+
+    All the analysis of *convdef* is done here, once, so that the returned
+    function only has to do the actual conversion. ``None`` is returned when
+    matched strings can be used as they are.
+
+    Args:
+        convdef: Format specification of the field
+        matched: If True, the strings to convert are known to match the
+            regular expression of the field (see :class:`RegexFormatter`),
+            so the checks it already does can be skipped.
+
+    """
     if "%" in convdef:
-        result = dt.datetime.strptime(stri, convdef)
+        return _get_datetime_converter(convdef, matched=matched)
+
+    strip = _get_padding_stripper(convdef)
+    cast = _get_number_type(convdef)
+    if cast is None:
+        return strip
+    if strip is None:
+        return cast
+
+    def _to_number(stri: str) -> Any:
+        return cast(strip(stri))
+
+    return _to_number
+
+
+# Datetime directives always made of a fixed number of digits, with the
+# datetime component they are parsed to
+FIXED_WIDTH_DT_FMT = {
+    "%Y": ("year", 4),
+    "%y": ("short_year", 2),
+    "%m": ("month", 2),
+    "%d": ("day", 2),
+    "%j": ("julian", 3),
+    "%H": ("hour", 2),
+    "%M": ("minute", 2),
+    "%S": ("second", 2),
+}
+DT_COMPONENTS = ("year", "short_year", "month", "day", "julian", "hour", "minute", "second")
+DT_ARGS = ("year", "month", "day", "hour", "minute", "second")
+# characters with a special meaning in regular expressions
+REGEX_SPECIAL_CHARS = frozenset(".^$*+?{}[]\\|()")
+
+
+def _get_datetime_converter(convdef: str, matched: bool = False) -> Callable[[str], dt.datetime]:
+    """Get a function converting strings to datetimes according to the strptime format *convdef*.
+
+    When *convdef* only has fixed width numeric directives (see
+    `FIXED_WIDTH_DT_FMT`), the datetime is built directly from slices of the
+    string, or with :meth:`datetime.datetime.fromisoformat` for ISO 8601
+    layouts, which is a lot faster than :meth:`datetime.datetime.strptime`.
+    Anything the fast path can't handle exactly, including all the errors, is
+    left to ``strptime``.
+
+    Args:
+        convdef: strptime format of the strings
+        matched: If True, the strings are known to match the regular
+            expression of the field, which checks the layout of fixed width
+            directives unless *convdef* has characters with a special
+            meaning in regular expressions.
+
+    """
+    layout = _get_fixed_width_datetime_layout(convdef)
+    if layout is None:
+
+        def _strptime(stri: str) -> dt.datetime:
+            return dt.datetime.strptime(stri, convdef)
+
+        return _strptime
+
+    check, components = layout
+    _build = _get_datetime_builder(components)
+    if _parses_as_isoformat(convdef, _build):
+        # e.g. "%Y-%m-%dT%H:%M:%S", or "%Y%m%d_%H%M" on Python 3.11+
+        _build = _get_isoformat_builder(dict(components).get("hour"))
+
+    if matched and REGEX_SPECIAL_CHARS.isdisjoint(convdef):
+
+        def _to_datetime(stri: str) -> dt.datetime:
+            try:
+                return _build(stri)
+            except ValueError:
+                pass
+            return dt.datetime.strptime(stri, convdef)
+
+    else:
+
+        def _to_datetime(stri: str) -> dt.datetime:
+            if check(stri) is not None:
+                try:
+                    return _build(stri)
+                except ValueError:
+                    pass
+            return dt.datetime.strptime(stri, convdef)
+
+    return _to_datetime
+
+
+def _get_datetime_builder(components: list[tuple[str, slice]]) -> Callable[[str], dt.datetime]:
+    """Get a function building datetimes from the components at the given positions of the strings."""
+    names = tuple(name for name, _span in components)
+    spans = [span for _name, span in components]
+    get_components: Callable[[str], tuple[str, ...]]
+    if len(spans) == 1:
+        span = spans[0]
+        get_components = lambda stri: (stri[span],)  # noqa: E731
     else:
-        result = _strip_padding(convdef, stri)
-        if "d" in convdef:
-            result = int(result)
-        elif "x" in convdef or "X" in convdef:
-            result = int(result, 16)
-        elif "o" in convdef:
-            result = int(result, 8)
-        elif "b" in convdef:
-            result = int(result, 2)
-        elif any(float_type_marker in convdef for float_type_marker in fixed_point_types):
-            result = float(result)
+        get_components = operator.itemgetter(*spans)
+
+    if len(names) >= 3 and names == DT_ARGS[: len(names)]:
+        # the components are exactly the leading arguments of datetime
+        make_datetime: Callable[..., dt.datetime] = dt.datetime
+
+        def _build(stri: str) -> dt.datetime:
+            return make_datetime(*map(int, get_components(stri)))
+
+    else:
+
+        def _build(stri: str) -> dt.datetime:
+            return _build_datetime(dict(zip(names, map(int, get_components(stri)))))
+
+    return _build
+
+
+# datetimes with distinct components, to check how strings are interpreted
+DT_PROBES = (dt.datetime(1987, 6, 25, 19, 43, 58), dt.datetime(2013, 11, 4, 8, 21, 37))
+
+
+def _parses_as_isoformat(convdef: str, build: Callable[[str], dt.datetime]) -> bool:
+    """Check if :meth:`datetime.datetime.fromisoformat` builds the same datetimes as *build*.
+
+    ``fromisoformat`` is a lot faster than building datetimes from their
+    components, and accepts more layouts in recent Python versions, so
+    strings formatted with *convdef* are tried out on the running Python.
+
+    """
+    for probe in DT_PROBES:
+        stri = probe.strftime(convdef)
+        try:
+            if dt.datetime.fromisoformat(stri) != build(stri):
+                return False
+        except ValueError:
+            return False
+    return True
+
+
+def _get_isoformat_builder(hour: slice | None) -> Callable[[str], dt.datetime]:
+    """Get a function building datetimes with :meth:`datetime.datetime.fromisoformat`.
+
+    Args:
+        hour: Position of the hour in the strings, as hour 24 is accepted by
+            some Python versions (as midnight of the next day) but not by
+            ``strptime``.
+
+    """
+    fromisoformat = dt.datetime.fromisoformat
+    if hour is None:
+        return fromisoformat
+
+    def _build(stri: str) -> dt.datetime:
+        if stri[hour] == "24":
+            raise ValueError(f"Invalid hour: {stri}")
+        return fromisoformat(stri)
+
+    return _build
+
+
+def _get_fixed_width_datetime_layout(
+    convdef: str,
+) -> tuple[Callable[[str], re.Match[str] | None], list[tuple[str, slice]]] | None:
+    """Analyse the layout of strings formatted with the strptime format *convdef*.
+
+    Returns:
+        A function checking that a string has the layout (fixed width digits
+        in between the literal characters), and the position of each datetime
+        component in the string, sorted as the arguments of
+        :class:`datetime.datetime`. ``None`` if *convdef* has directives not in
+        `FIXED_WIDTH_DT_FMT` or if a datetime component is given more than
+        once.
 
-    return result
+    """
+    regex = ""
+    components = {}
+    position = 0
+    for literal, directive in re.findall(r"([^%]*)(%.?)?", convdef):
+        regex += re.escape(literal)
+        position += len(literal)
+        if not directive:
+            continue
+        if directive not in FIXED_WIDTH_DT_FMT:
+            return None
+        name, width = FIXED_WIDTH_DT_FMT[directive]
+        if name in components or name.replace("short_", "") in components or "short_" + name in components:
+            return None
+        components[name] = slice(position, position + width)
+        regex += r"\d{%d}" % width
+        position += width
+    return re.compile(regex).fullmatch, sorted(components.items(), key=lambda item: DT_COMPONENTS.index(item[0]))
+
+
+def _build_datetime(values: dict[str, int]) -> dt.datetime:
+    """Build a datetime from its parsed components, the same way strptime does."""
+    if "short_year" in values:
+        short_year = values["short_year"]
+        year = short_year + (2000 if short_year <= 68 else 1900)
+    else:
+        year = values.get("year", 1900)
+    month = values.get("month", 1)
+    day = values.get("day", 1)
+    julian = values.get("julian")
+    if julian is not None:
+        # the day of the year takes precedence over month and day, but those
+        # still have to be valid
+        if not (1 <= julian <= 366 and 1 <= month <= 12 and 1 <= day <= 31):
+            raise ValueError(f"Invalid date: day of the year {julian}, month {month}, day {day}")
+        date = dt.date.fromordinal(julian - 1 + dt.date(year, 1, 1).toordinal())
+        year, month, day = date.year, date.month, date.day
+    return dt.datetime(year, month, day, values.get("hour", 0), values.get("minute", 0), values.get("second", 0))
+
+
+def _get_number_type(convdef: str) -> Callable[[str], Any] | None:
+    """Get the function casting a (padding free) string to the numeric type of *convdef*."""
+    if "d" in convdef:
+        return int
+    if "x" in convdef or "X" in convdef:
+        return partial(int, base=16)
+    if "o" in convdef:
+        return partial(int, base=8)
+    if "b" in convdef:
+        return partial(int, base=2)
+    if any(float_type_marker in convdef for float_type_marker in fixed_point_types):
+        return float
+    return None
+
+
+def _get_field_type(convdef: str) -> type:
+    """Get the type of the values parsed with the given conversion definition *convdef*."""
+    if "%" in convdef:
+        return dt.datetime
+    cast = _get_number_type(convdef)
+    if cast is None:
+        return str
+    if cast is float:
+        return float
+    return int
 
 
 def _strip_padding(convdef: str, stri: str) -> str:
@@ -424,6 +1472,14 @@ def _strip_padding(convdef: str, stri: str) -> str:
         convdef: Conversion definition (indicates the padding)
         stri: String to be modified
     """
+    strip = _get_padding_stripper(convdef)
+    if strip is None:
+        return stri
+    return strip(stri)
+
+
+def _get_padding_stripper(convdef: str) -> Callable[[str], str] | None:
+    """Get the function stripping the padding indicated by *convdef*, if any."""
     regex_match = fmt_spec_regex.match(convdef)
     match_dict = regex_match.groupdict() if regex_match else {}
     align = match_dict.get("align")
@@ -434,17 +1490,20 @@ def _strip_padding(convdef: str, stri: str) -> str:
     if align and align in "<>^" and not pad:
         pad = " "
     if align == ">":
-        stri = stri.lstrip(pad)
-    elif align == "<":
-        stri = stri.rstrip(pad)
-    elif align == "^":
-        stri = stri.strip(pad)
-    return stri
+        return operator.methodcaller("lstrip", pad)
+    if align == "<":
+        return operator.methodcaller("rstrip", pad)
+    if align == "^":
+        return operator.methodcaller("strip", pad)
+    return None
 
 
-@lru_cache()
 def get_convert_dict(fmt: str) -> dict[str, str]:
     """Retrieve parse definition from the format string `fmt`."""
+    return _compile_format(fmt).convert_dict
+
+
+def _get_convert_dict(fmt: str) -> dict[str, str]:
     convdef = {}
     for _literal_text, field_name, format_spec, _conversion in formatter.parse(fmt):
         if field_name is None or format_spec is None:
@@ -454,21 +1513,1096 @@ def get_convert_dict(fmt: str) -> dict[str, str]:
     return convdef
 
 
-def parse(fmt: str, stri: str, full_match: bool = True) -> dict[str, Any]:
+class FormatStats:
+    """Statistics of the parsing of strings with a format, see :func:`enable_stats`.
+
+    Attributes:
+        calls: Number of strings parsed or validated
+        failures: Number of strings not matching the format, or with values
+            that could not be converted
+        match_time: Time spent matching the strings with the regular
+            expression of the format, in seconds
+        convert_time: Time spent converting the matched values, e.g. to
+            numbers or datetimes, in seconds
+
+    """
+
+    __slots__ = ("calls", "failures", "match_time", "convert_time")
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.failures = 0
+        self.match_time = 0.0
+        self.convert_time = 0.0
+
+    def __repr__(self) -> str:
+        return (
+            f"FormatStats(calls={self.calls}, failures={self.failures}, "
+            f"match_time={self.match_time:.6f}, convert_time={self.convert_time:.6f})"
+        )
+
+    def copy(self) -> FormatStats:
+        stats = FormatStats()
+        stats.calls, stats.failures = self.calls, self.failures
+        stats.match_time, stats.convert_time = self.match_time, self.convert_time
+        return stats
+
+
+class ParsedRecord(collections.abc.Mapping):
+    """Values parsed from a string as attributes, see the ``as_record`` argument of :meth:`Parser.parse`.
+
+    A subclass is generated for each format, with a slot for each field, in
+    the order of the format. Records are also read-only mappings of the
+    field names to the values, like the dictionaries returned otherwise, but
+    take less than half of their memory (not counting the values themselves).
+
+    >>> record = Parser("{platform}_{orbit:05d}.l1b").parse("noaa19_12345.l1b", as_record=True)
+    >>> record.orbit
+    12345
+    >>> record["platform"]
+    'noaa19'
+    >>> record == {"platform": "noaa19", "orbit": 12345}
+    True
+
+    """
+
+    __slots__ = ()
+    # set for each format, see _make_record_type
+    _fmt = ""
+    _fields: tuple[str, ...] = ()
+    _field_names: frozenset[str] = frozenset()
+    _setters: tuple[tuple[str, Callable[[Any, Any], None]], ...] = ()
+
+    @classmethod
+    def _from_keyvals(cls, keyvals: Mapping[str, Any]) -> ParsedRecord:
+        record = object.__new__(cls)
+        for key, set_value in cls._setters:
+            set_value(record, keyvals[key])
+        return record
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self._field_names:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._fields)
+
+    def __len__(self) -> int:
+        return len(self._fields)
+
+    def __repr__(self) -> str:
+        values = ", ".join(f"{key}={getattr(self, key)!r}" for key in self._fields)
+        return f"{type(self).__name__}({values})"
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        # the generated classes can't be imported, they are generated again from the format
+        return _make_record, (self._fmt, tuple(getattr(self, key) for key in self._fields))
+
+
+def _make_record_type(fmt: str, fields: tuple[str, ...]) -> type[ParsedRecord]:
+    """Generate the :class:`ParsedRecord` class of *fmt*, with the given *fields*."""
+    for key in fields:
+        if hasattr(ParsedRecord, key):
+            raise ValueError(f"Key {key!r} of the format {fmt!r} can't be used as an attribute of a record")
+    namespace = {"__slots__": fields, "_fmt": fmt, "_fields": fields, "_field_names": frozenset(fields)}
+    record_type = typing.cast("type[ParsedRecord]", type("ParsedRecord", (ParsedRecord,), namespace))
+    record_type._setters = tuple((key, getattr(record_type, key).__set__) for key in fields)
+    return record_type
+
+
+def _make_record(fmt: str, values: tuple[Any, ...]) -> ParsedRecord:
+    record_type = _compile_format(fmt).record_type
+    return record_type._from_keyvals(dict(zip(record_type._fields, values)))
+
+
+class _StatsCollector:
+    """Parse and validate strings like :class:`_CompiledFormat`, collecting statistics on the way."""
+
+    def __init__(self, callback: Callable[[str, bool, float, float], Any] | None = None):
+        self.callback = callback
+
+    def parse(
+        self,
+        compiled: _CompiledFormat,
+        stri: str | bytes,
+        full_match: bool = True,
+        converters: tuple[tuple[str, Callable[[str], Any]], ...] | None = None,
+    ) -> dict[str, Any]:
+        start = time.perf_counter()
+        if isinstance(stri, bytes):
+            stri = os.fsdecode(stri)
+        regex_match = (compiled.pattern if full_match else compiled.prefix_pattern).match(stri)
+        matched = time.perf_counter()
+        if regex_match is None:
+            self._record(compiled.fmt, True, matched - start, 0.0)
+            raise ValueError("String does not match pattern.")
+        keyvals = regex_match.groupdict()
+        try:
+            for key, converter in compiled.converters if converters is None else converters:
+                keyvals[key] = converter(keyvals[key])
+        except ValueError:
+            self._record(compiled.fmt, True, matched - start, time.perf_counter() - matched)
+            raise
+        self._record(compiled.fmt, False, matched - start, time.perf_counter() - matched)
+        return keyvals
+
+    def try_parse(self, compiled: _CompiledFormat, stri: str | bytes, full_match: bool = True) -> dict[str, Any] | None:
+        try:
+            return self.parse(compiled, stri, full_match=full_match)
+        except ValueError:
+            return None
+
+    def validate(self, compiled: _CompiledFormat, stri: str | bytes) -> bool:
+        try:
+            self.parse(compiled, stri, converters=compiled.checks)
+        except ValueError:
+            return False
+        return True
+
+    def _record(self, fmt: str, failed: bool, match_time: float, convert_time: float) -> None:
+        with _stats_lock:
+            stats = _collected_stats.get(fmt)
+            if stats is None:
+                stats = _collected_stats[fmt] = FormatStats()
+            stats.calls += 1
+            stats.failures += failed
+            stats.match_time += match_time
+            stats.convert_time += convert_time
+        if self.callback is not None:
+            self.callback(fmt, failed, match_time, convert_time)
+
+
+_stats_collector: _StatsCollector | None = None
+_collected_stats: dict[str, FormatStats] = {}
+_stats_lock = threading.Lock()
+
+
+_FIELD_ROOT_REGEX = re.compile(r"(\w*)(?:[.\[]|$)")
+
+
+class _CompiledFormat:
+    """Parsing and composing definitions of a format string, analysed and compiled once.
+
+    Each definition is only compiled when first needed, as some format
+    strings can be composed but not parsed, or the other way around.
+    Instances are shared (see :func:`_compile_format`) and must be treated as
+    read-only.
+
+    Instances are used from several threads without locking: the definitions
+    never change once computed, and a definition first needed by several
+    threads at once is at worst computed more than once, to the same value.
+
+    """
+
+    # definitions that can be saved to a cache file, see FormatRegistry.save
+    SAVED_DEFINITIONS = ("regex", "convert_dict", "compose_segments")
+
+    def __init__(self, fmt: str):
+        self.fmt = fmt
+
+    @classmethod
+    def from_definitions(cls, fmt: str, definitions: Mapping[str, Any]) -> _CompiledFormat:
+        """Create the compiled format for *fmt* from the definitions saved in a cache file."""
+        compiled = cls(fmt)
+        for name in cls.SAVED_DEFINITIONS:
+            if name in definitions:
+                # set the cached properties
+                vars(compiled)[name] = definitions[name]
+        return compiled
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        # shared through the registry of the process it is unpickled in
+        return _compile_format, (self.fmt,)
+
+    def get_definitions(self) -> dict[str, Any]:
+        """Get the definitions to save in a cache file, if they were already computed."""
+        computed = vars(self)
+        return {name: computed[name] for name in self.SAVED_DEFINITIONS if name in computed}
+
+    @cached_property
+    def regex(self) -> str:
+        return regex_formatter.format(self.fmt)
+
+    @cached_property
+    def convert_dict(self) -> dict[str, str]:
+        return _get_convert_dict(self.fmt)
+
+    @cached_property
+    def pattern(self) -> re.Pattern[str] | _SegmentPattern:
+        regex = re.compile("^" + self.regex + "$")
+        return _get_segment_pattern(self.fmt, regex) or regex
+
+    @cached_property
+    def converters(self) -> tuple[tuple[str, Callable[[str], Any]], ...]:
+        return tuple(
+            (key, converter)
+            for key, convdef in self.convert_dict.items()
+            if (converter := _get_converter(convdef, matched=True)) is not None
+        )
+
+    @cached_property
+    def checks(self) -> tuple[tuple[str, Callable[[str], Any]], ...]:
+        """Converters of the fields whose values can match the regex and still be invalid.
+
+        String fields are fully checked by the regex, but e.g. a number
+        field with fill characters or a datetime field with month 13 are not.
+
+        """
+        field_types = self.field_types
+        return tuple((key, converter) for key, converter in self.converters if field_types[key] is not str)
+
+    @cached_property
+    def record_type(self) -> type[ParsedRecord]:
+        return _make_record_type(self.fmt, tuple(self.convert_dict))
+
+    @cached_property
+    def field_types(self) -> dict[str, type]:
+        return {key: _get_field_type(convdef) for key, convdef in self.convert_dict.items()}
+
+    @cached_property
+    def field_roots(self) -> frozenset[str]:
+        """Names of the parameters used by the fields, without their attribute or item accessors."""
+        return frozenset(
+            _get_field_root(field_name) for _, field_name, _, _ in formatter.parse(self.fmt) if field_name is not None
+        )
+
+    @cached_property
+    def partial_formats(self) -> dict[frozenset[str], _CompiledFormat]:
+        """Compiled formats for partial composition, by set of provided parameters."""
+        return {}
+
+    @cached_property
+    def compose_segments(self) -> tuple[Sequence[Sequence[Any]], str] | None:
+        return _get_compose_segments(self.fmt)
+
+    @cached_property
+    def compose_plan(self) -> ComposePlan | None:
+        """Segments to join to compose the format.
+
+        ``None`` if the format uses field names or specifications
+        :func:`_get_compose_segments` can't handle.
+
+        """
+        segments = self.compose_segments
+        return None if segments is None else _compile_compose_plan(segments)
+
+    @cached_property
+    def prefix_pattern(self) -> re.Pattern[str] | _SegmentPattern:
+        """Pattern used when the whole string does not have to match."""
+        regex = re.compile(self.regex)
+        return _get_segment_pattern(self.fmt, regex, full_match=False) or regex
+
+    def match(self, stri: str | bytes, full_match: bool = True) -> re.Match[str] | _SegmentMatch:
+        if isinstance(stri, bytes):
+            stri = os.fsdecode(stri)
+        pattern = self.pattern if full_match else self.prefix_pattern
+        match = pattern.match(stri)
+        if match is None:
+            raise ValueError("String does not match pattern.")
+        return match
+
+    def parse(self, stri: str | bytes, full_match: bool = True) -> dict[str, Any]:
+        collector = _stats_collector
+        if collector is not None:
+            return collector.parse(self, stri, full_match)
+        keyvals = self.match(stri, full_match=full_match).groupdict()
+        for key, converter in self.converters:
+            keyvals[key] = converter(keyvals[key])
+        return keyvals
+
+    def validate(self, stri: str | bytes) -> bool:
+        collector = _stats_collector
+        if collector is not None:
+            return collector.validate(self, stri)
+        if isinstance(stri, bytes):
+            stri = os.fsdecode(stri)
+        try:
+            regex_match = self.pattern.match(stri)
+        except ValueError:
+            # the format can't be turned into a regex, so nothing conforms to it
+            return False
+        if regex_match is None:
+            return False
+        return not self.checks or self._check(regex_match)
+
+    def validate_iter(self, strings: Iterable[str | bytes]) -> Iterator[bool]:
+        collector = _stats_collector
+        if collector is not None:
+            yield from (collector.validate(self, stri) for stri in strings)
+            return
+        try:
+            match = self.pattern.match
+        except ValueError:
+            # the format can't be turned into a regex, so nothing conforms to it
+            yield from (False for _stri in strings)
+            return
+        check = self._check if self.checks else None
+        for stri in strings:
+            if isinstance(stri, bytes):
+                stri = os.fsdecode(stri)
+            regex_match = match(stri)
+            if regex_match is None:
+                yield False
+            elif check is None:
+                yield True
+            else:
+                yield check(regex_match)
+
+    def _check(self, regex_match: re.Match[str] | _SegmentMatch) -> bool:
+        try:
+            for key, converter in self.checks:
+                converter(regex_match[key])
+        except ValueError:
+            return False
+        return True
+
+    def compose(self, keyvals: Mapping[str, Any]) -> str:
+        plan = self.compose_plan
+        if plan is None:
+            return formatter.format(self.fmt, **keyvals)
+        fields, tail = plan
+        parts = []
+        for literal, key, convert, format_value in fields:
+            value = keyvals[key]
+            if convert is not None:
+                value = convert(value)
+            parts.append(literal)
+            parts.append(format_value(value))
+        parts.append(tail)
+        return "".join(parts)
+
+    def compose_partial(self, keyvals: Mapping[str, Any]) -> str:
+        provided = self.field_roots.intersection(keyvals)
+        partial_format = self.partial_formats.get(provided)
+        if partial_format is None:
+            partial_format = _CompiledFormat(_get_partial_format(self.fmt, provided))
+            self.partial_formats[provided] = partial_format
+        return partial_format.compose(keyvals)
+
+    def try_parse(self, stri: str | bytes, full_match: bool = True) -> dict[str, Any] | None:
+        """Parse *stri*, or return None if it doesn't match (same as :meth:`parse_iter`)."""
+        collector = _stats_collector
+        if collector is not None:
+            return collector.try_parse(self, stri, full_match)
+        if isinstance(stri, bytes):
+            stri = os.fsdecode(stri)
+        regex_match = (self.pattern if full_match else self.prefix_pattern).match(stri)
+        if regex_match is None:
+            return None
+        keyvals = regex_match.groupdict()
+        try:
+            for key, converter in self.converters:
+                keyvals[key] = converter(keyvals[key])
+        except ValueError:
+            return None
+        return keyvals
+
+    def parse_iter(
+        self, strings: Iterable[str | bytes], full_match: bool = True, skip_unmatched: bool = False
+    ) -> Iterator[dict[str, Any] | None]:
+        collector = _stats_collector
+        if collector is not None:
+            results = (collector.try_parse(self, stri, full_match) for stri in strings)
+            yield from (keyvals for keyvals in results if keyvals is not None or not skip_unmatched)
+            return
+        match = (self.pattern if full_match else self.prefix_pattern).match
+        converters = self.converters
+        for stri in strings:
+            if isinstance(stri, bytes):
+                stri = os.fsdecode(stri)
+            regex_match = match(stri)
+            if regex_match is not None:
+                keyvals = regex_match.groupdict()
+                try:
+                    for key, converter in converters:
+                        keyvals[key] = converter(keyvals[key])
+                except ValueError:
+                    # e.g. a date that can't exist, same as a non-matching string
+                    pass
+                else:
+                    yield keyvals
+                    continue
+            if not skip_unmatched:
+                yield None
+
+
+def _get_compose_segments(fmt: str) -> tuple[list[tuple[str, str, str | None, str]], str] | None:
+    """Split *fmt* into the segments of its compose plan (see `_CompiledFormat.compose_plan`).
+
+    Returns:
+        The literal text, field name, conversion and format specification of
+        each field, and the literal text after the last field. ``None`` if
+        *fmt* uses field names or specifications the compose plan can't
+        handle.
+
+    """
+    fields = []
+    literal = ""
+    for literal_text, field_name, format_spec, conversion in formatter.parse(fmt):
+        # escaped braces split the literal text
+        literal += literal_text
+        if field_name is None:
+            continue
+        format_spec = format_spec or ""
+        if not field_name.isidentifier() or "{" in format_spec:
+            # positional, attribute or item fields, or nested fields
+            return None
+        fields.append((literal, field_name, conversion, format_spec))
+        literal = ""
+    return fields, literal
+
+
+def _compile_compose_plan(segments: tuple[Sequence[Sequence[Any]], str]) -> ComposePlan:
+    """Compile the plan to compose a format from its *segments* (see :func:`_get_compose_segments`)."""
+    fields, tail = segments
+    plan_fields = []
+    for literal, field_name, conversion, format_spec in fields:
+        convert = None if conversion is None else partial(formatter.convert_field, conversion=conversion)
+        plan_fields.append((literal, field_name, convert, ("{:" + format_spec + "}").format))
+    return tuple(plan_fields), tail
+
+
+# Formats with several fields of unspecified width are still matched with
+# their regular expression if the estimated cost of backtracking is below
+# this, see _SegmentPattern
+REGEX_MAX_COST = 50_000
+# regular expressions of the fields of unspecified width, with the characters they can't match
+# and whether they can start with a sign that is one of these characters
+UNBOUNDED_FIELD_STOPS = {
+    ".*?": (re.compile("\n"), False),
+    r"\S*?": (re.compile(r"\s"), False),
+    r"[-+]?\d*?": (re.compile(r"\D"), True),
+    r"[-+]?[0-7]*?": (re.compile("[^0-7]"), True),
+    r"[-+]?[0-1]*?": (re.compile("[^0-1]"), True),
+}
+FIXED_WIDTH_FIELD_REGEX = re.compile(r"\(\?P<\w+>\.\{(\d+)\}\)")
+FIXED_WIDTH_DT_REGEX = re.compile(r"\\d\{(\d+)\}|(.)", re.DOTALL)
+
+
+class _SegmentMatch:
+    """Result of :meth:`_SegmentPattern.match`, with the parts of :class:`re.Match` used for parsing."""
+
+    __slots__ = ("_groups",)
+
+    def __init__(self, groups: dict[str, str]):
+        self._groups = groups
+
+    def groupdict(self) -> dict[str, str]:
+        return dict(self._groups)
+
+    def __getitem__(self, name: str) -> str:
+        return self._groups[name]
+
+
+class _SegmentPattern:
+    """Matcher with a bounded cost for formats with several fields of unspecified width.
+
+    The regular expression of such formats (e.g. ``{a}_{b}_{c}.txt``)
+    backtracks on strings that nearly match, trying every way to split the
+    string between the fields, whose number grows as a power of the length of
+    the string. Here the format is split into the fields of unspecified width
+    and the fixed width segments in between (literal text and fixed width
+    fields). Each field ends where the next segment is first found such that
+    the rest of the format still matches, which gives the same values as the
+    regular expression. Unless the string has characters a field can't match
+    (e.g. whitespace for ``{a:s}``), the first place the segment is found is
+    the only one to try, and the string is scanned once. Otherwise, the
+    places found not to lead to a match are remembered, so that the cost
+    stays polynomial. Integer fields (e.g. ``{orbit:d}``) are fields of
+    unspecified width that can't match other characters than digits, except
+    for a leading sign.
+
+    Matching this way is slower than with the regular expression when it
+    doesn't backtrack much, so the regular expression is still used when the
+    number of places the segments could be found in the string is small
+    enough (see `REGEX_MAX_COST`).
+
+    Instances are used in place of the compiled regular expressions of the
+    formats, see :func:`_get_segment_pattern`.
+
+    Args:
+        regex: Compiled regular expression of the format
+        head: Segment the strings start with
+        fields: Name of each field of unspecified width, with the characters
+            it can't match, the segment following it with its width, and
+            whether the field can start with a sign
+        full_match: If False, the strings only have to start with the format
+
+    """
+
+    def __init__(
+        self,
+        regex: re.Pattern[str],
+        head: re.Pattern[str],
+        fields: list[tuple[str, re.Pattern[str], re.Pattern[str], int, bool]],
+        full_match: bool = True,
+    ):
+        self.regex = regex
+        self.head = head
+        self.fields = fields
+        self.full_match = full_match
+        # first character of the segments following the fields but the last,
+        # None if it can be any character
+        self._first_chars = [
+            _get_first_char(segment.pattern) for _field_name, _stop, segment, _width, _sign in fields[:-1]
+        ]
+        self._stops = re.compile("|".join({stop.pattern for _field_name, stop, _segment, _width, _sign in fields}))
+        self.groupindex = {
+            name: index
+            for index, name in enumerate(
+                itertools.chain(
+                    head.groupindex,
+                    *((field_name, *segment.groupindex) for field_name, _stop, segment, _width, _sign in fields),
+                ),
+                1,
+            )
+        }
+
+    def match(self, stri: str) -> re.Match[str] | _SegmentMatch | None:
+        if self._get_regex_cost(stri) <= REGEX_MAX_COST:
+            return self.regex.match(stri)
+        head_match = self.head.match(stri)
+        if head_match is None:
+            return None
+        if self._stops.search(stri) is None:
+            groups = self._match_first_segments(stri, head_match.end())
+        else:
+            groups = self._match_fields(stri, 0, head_match.end(), set())
+        if groups is None:
+            return None
+        return _SegmentMatch({**head_match.groupdict(), **groups})
+
+    def _get_regex_cost(self, stri: str) -> int:
+        """Estimate the cost of matching *stri* with the regular expression.
+
+        The regular expression tries each place the segments could be found,
+        for each field but the last, i.e. each occurrence of their first
+        character.
+
+        """
+        cost = len(stri)
+        for first_char in self._first_chars:
+            cost *= (len(stri) if first_char is None else stri.count(first_char)) + 1
+            if cost > REGEX_MAX_COST:
+                break
+        return cost
+
+    def _match_first_segments(self, stri: str, position: int) -> dict[str, str] | None:
+        """Match the fields, knowing that they can match any character of *stri*.
+
+        A field starting earlier can then always take the place of the same
+        field starting later, so each field simply ends where the next
+        segment is first found.
+
+        """
+        groups = {}
+        for field_name, _stop, segment, _width, _sign in self.fields[:-1]:
+            segment_match = segment.search(stri, position)
+            if segment_match is None:
+                return None
+            groups[field_name] = stri[position : segment_match.start()]
+            groups.update(segment_match.groupdict())
+            position = segment_match.end()
+        segment_match = self._match_last_segment(stri, position, len(stri))
+        if segment_match is None:
+            return None
+        groups[self.fields[-1][0]] = stri[position : segment_match.start()]
+        groups.update(segment_match.groupdict())
+        return groups
+
+    def _match_fields(
+        self, stri: str, index: int, position: int, failed: set[tuple[int, int]]
+    ) -> dict[str, str] | None:
+        """Match the fields from *index* on, starting at *position*, remembering the places that don't match."""
+        field_name, stop, segment, width, sign = self.fields[index]
+        # as with the regular expression, a leading sign is taken by the field
+        # first, and only left to the segment if nothing else matches
+        start = position + 1 if sign and stri.startswith(("-", "+"), position) else position
+        stop_match = stop.search(stri, start)
+        limit = len(stri) if stop_match is None else stop_match.start()
+        if index == len(self.fields) - 1:
+            segment_match = self._match_last_segment(stri, start, limit)
+            if segment_match is None and start != position:
+                segment_match = self._match_last_segment(stri, position, position)
+            if segment_match is None:
+                return None
+            return {field_name: stri[position : segment_match.start()], **segment_match.groupdict()}
+        rest = self._match_next_fields(stri, index, start, limit, failed)
+        if rest is None and start != position:
+            rest = self._match_next_fields(stri, index, position, position, failed)
+        if rest is None:
+            failed.add((index, position))
+            return None
+        segment_start, groups = rest
+        return {field_name: stri[position:segment_start], **groups}
+
+    def _match_next_fields(
+        self, stri: str, index: int, start: int, limit: int, failed: set[tuple[int, int]]
+    ) -> tuple[int, dict[str, str]] | None:
+        """Match the segment after field *index*, found from *start* to *limit*, and the fields after it.
+
+        Returns:
+            Where the segment starts, and the values of its fields and of the
+            fields after it.
+
+        """
+        _field_name, _stop, segment, width, _sign = self.fields[index]
+        _next_name, next_stop, _next_segment, _next_width, next_sign = self.fields[index + 1]
+        while (segment_match := segment.search(stri, start)) is not None and segment_match.start() <= limit:
+            end = segment_match.end()
+            if (index + 1, end) not in failed:
+                rest = self._match_fields(stri, index + 1, end, failed)
+                if rest is not None:
+                    return segment_match.start(), {**segment_match.groupdict(), **rest}
+            # The next field could also have taken the characters up to its
+            # next stop character: the segment has to end after it for the
+            # rest to match. A stop character may also be the sign of the
+            # next field, which it can't take after other characters.
+            stop_match = next_stop.search(stri, end)
+            if stop_match is None:
+                break
+            start = max(segment_match.start() + 1, stop_match.start() + (not next_sign) - width)
+        return None
+
+    def _match_last_segment(self, stri: str, position: int, limit: int) -> re.Match[str] | None:
+        _field_name, _stop, segment, width, _sign = self.fields[-1]
+        if not self.full_match:
+            segment_match = segment.search(stri, position)
+            return segment_match if segment_match is not None and segment_match.start() <= limit else None
+        # "$" also matches before a newline at the end of the string
+        ends = (len(stri) - 1, len(stri)) if stri.endswith("\n") else (len(stri),)
+        for end in ends:
+            if position <= end - width <= limit and (segment_match := segment.match(stri, end - width)):
+                return segment_match
+        return None
+
+
+def _get_segment_pattern(fmt: str, regex: re.Pattern[str], full_match: bool = True) -> _SegmentPattern | None:
+    """Get the matcher of *fmt* avoiding backtracking, if it has several fields of unspecified width.
+
+    ``None`` is returned if *fmt* has less than two fields of unspecified
+    width, as its regular expression can't backtrack much, or if it has
+    fields whose width depends on the string in other ways (e.g.
+    ``{value:f}``).
+
+    """
+    # regular expressions and widths of the segments, in between the fields of unspecified width
+    segments: list[tuple[list[str], int]] = [([], 0)]
+    fields = []
+    names = set()
+    for literal, field_name, format_spec, conversion in formatter.parse(fmt):
+        regexes, width = segments[-1]
+        if literal:
+            regexes.append(regex_formatter._escape(literal))
+            width += len(literal)
+        segments[-1] = regexes, width
+        if field_name is None:
+            continue
+        if conversion is not None or not field_name.isidentifier() or field_name in names:
+            return None
+        names.add(field_name)
+        field_regex = _get_field_regex(field_name, format_spec or "")
+        unbounded = field_regex[len(field_name) + 5 : -1]
+        if unbounded in UNBOUNDED_FIELD_STOPS:
+            fields.append((field_name, *UNBOUNDED_FIELD_STOPS[unbounded]))
+            segments.append(([], 0))
+        elif (field_width := _get_fixed_field_width(field_regex)) is not None:
+            segments[-1] = regexes + [field_regex], width + field_width
+        else:
+            return None
+    if len(fields) < 2:
+        return None
+    (head, _head_width), *tails = ((re.compile("".join(regexes)), width) for regexes, width in segments)
+    return _SegmentPattern(
+        regex,
+        head,
+        [(field_name, stop, tail, width, sign) for (field_name, stop, sign), (tail, width) in zip(fields, tails)],
+        full_match=full_match,
+    )
+
+
+def _get_first_char(regex: str) -> str | None:
+    """Get the character strings matching the segment *regex* start with, ``None`` if it can be any."""
+    if not regex or regex[0] == "(":
+        return None
+    # escaped literal text, see RegexFormatter._escape
+    return regex[1] if regex[0] == "\\" else regex[0]
+
+
+def _get_field_regex(field_name: str, format_spec: str) -> str:
+    """Get the regular expression of a field, as in :meth:`RegexFormatter.regex_field`."""
+    if "{" in format_spec:
+        # nested fields, not analysed
+        return ""
+    if not format_spec:
+        return r"(?P<{}>.*?)".format(field_name)
+    if "%" in format_spec:
+        return r"(?P<{}>{})".format(field_name, regex_formatter._regex_datetime(format_spec))
+    return format_spec_to_regex(field_name, format_spec)
+
+
+def _get_fixed_field_width(field_regex: str) -> int | None:
+    """Get the width of the strings matching *field_regex*, ``None`` if it varies or can't be told."""
+    regex_match = FIXED_WIDTH_FIELD_REGEX.fullmatch(field_regex)
+    if regex_match is not None:
+        return int(regex_match[1])
+    if not field_regex.startswith("(?P<"):
+        return None
+    # datetime fields made of fixed width numbers and literal characters
+    width = 0
+    for digits, literal in FIXED_WIDTH_DT_REGEX.findall(field_regex[field_regex.index(">") + 1 : -1]):
+        if literal != "." and literal in REGEX_SPECIAL_CHARS:
+            return None
+        width += int(digits) if digits else 1
+    return width
+
+
+# default value of the settings left unchanged
+_UNCHANGED: Any = object()
+
+
+class RegistryInfo(typing.NamedTuple):
+    """Statistics of a :class:`FormatRegistry`."""
+
+    hits: int
+    misses: int
+    evictions: int
+    maxsize: int | None
+    pinned: int
+    currsize: int
+
+
+class FormatRegistry:
+    """Registry of the compiled format strings, shared by all the parsing and composing functions.
+
+    Analysing and compiling a format string is a lot slower than using it, so
+    the compiled formats are kept for reuse. When the registry is full, the
+    least recently used (``"lru"`` policy) or the oldest (``"fifo"`` policy)
+    format is evicted. Pinned formats are never evicted.
+
+    The registry used by trollsift is ``trollsift.parser.format_registry``:
+
+    >>> from trollsift.parser import format_registry
+    >>> format_registry.configure(maxsize=4096)
+
+    Args:
+        maxsize: Maximum number of compiled formats to keep. ``None`` means
+            no limit, 0 disables the caching of (unpinned) formats.
+        policy: Eviction policy, ``"lru"`` or ``"fifo"``.
+
+    """
+
+    POLICIES = ("lru", "fifo")
+
+    def __init__(self, maxsize: int | None = 1024, policy: str = "lru"):
+        self._formats: collections.OrderedDict[str, _CompiledFormat] = collections.OrderedDict()
+        self._pins: collections.Counter[str] = collections.Counter()
+        self._lock = threading.Lock()
+        self._hits = self._misses = self._evictions = 0
+        self.maxsize: int | None = 0
+        self.policy = "lru"
+        self.configure(maxsize=maxsize, policy=policy)
+
+    def configure(self, maxsize: int | None = _UNCHANGED, policy: str = _UNCHANGED) -> None:
+        """Change the maximum size and/or the eviction policy of the registry.
+
+        Formats exceeding the new maximum size are evicted straight away.
+
+        Args:
+            maxsize: Maximum number of compiled formats to keep, as in the
+                class. Not changed if not given.
+            policy: Eviction policy, as in the class. Not changed if not given.
+
+        """
+        if policy is not _UNCHANGED and policy not in self.POLICIES:
+            raise ValueError(f"Unknown eviction policy {policy!r}, should be one of {self.POLICIES}")
+        if maxsize is not _UNCHANGED and maxsize is not None and maxsize < 0:
+            raise ValueError(f"The maximum size can't be negative, got {maxsize}")
+        with self._lock:
+            if maxsize is not _UNCHANGED:
+                self.maxsize = maxsize
+            if policy is not _UNCHANGED:
+                self.policy = policy
+            self._evict()
+
+    def get(self, fmt: str) -> _CompiledFormat:
+        """Get the compiled format for *fmt*, compiling it if needed."""
+        with self._lock:
+            compiled = self._formats.get(fmt)
+            if compiled is not None:
+                self._hits += 1
+                if self.policy == "lru":
+                    self._formats.move_to_end(fmt)
+                return compiled
+            self._misses += 1
+            compiled = _CompiledFormat(fmt)
+            self._formats[fmt] = compiled
+            self._evict()
+            return compiled
+
+    def pin(self, fmt: str) -> None:
+        """Never evict the compiled format for *fmt* until it is unpinned.
+
+        Pins are counted: a format pinned twice has to be unpinned twice.
+
+        """
+        with self._lock:
+            self._pins[fmt] += 1
+
+    def unpin(self, fmt: str) -> None:
+        """Allow the compiled format for *fmt* to be evicted again (see :meth:`pin`)."""
+        with self._lock:
+            if self._pins[fmt] <= 1:
+                del self._pins[fmt]
+                self._evict()
+            else:
+                self._pins[fmt] -= 1
+
+    def _evict(self) -> None:
+        if self.maxsize is None:
+            return
+        excess = len(self._formats) - self.maxsize
+        if excess <= 0:
+            return
+        evictable = (fmt for fmt in self._formats if fmt not in self._pins)
+        for fmt in list(itertools.islice(evictable, excess)):
+            del self._formats[fmt]
+            self._evictions += 1
+
+    def cache_info(self) -> RegistryInfo:
+        """Get the statistics of the registry, in the spirit of :func:`functools.lru_cache`."""
+        with self._lock:
+            pinned = sum(fmt in self._pins for fmt in self._formats)
+            return RegistryInfo(self._hits, self._misses, self._evictions, self.maxsize, pinned, len(self._formats))
+
+    def cache_clear(self) -> None:
+        """Remove all the compiled formats, pinned or not, and reset the statistics.
+
+        Pins are kept, so formats compiled again afterwards are still pinned.
+
+        """
+        with self._lock:
+            self._formats.clear()
+            self._hits = self._misses = self._evictions = 0
+
+    def save(self, path: str | os.PathLike[str]) -> None:
+        """Save the definitions of the compiled formats to the cache file *path*.
+
+        Only the definitions already computed, e.g. the regular expression of
+        a format that was used for parsing, are saved. They can be loaded
+        with :meth:`load` in other processes to skip analysing the formats
+        again.
+
+        """
+        from trollsift import __version__
+
+        with self._lock:
+            formats = {fmt: compiled.get_definitions() for fmt, compiled in self._formats.items()}
+        cache = {"trollsift_version": __version__, "formats": formats}
+        path = os.fspath(path)
+        # unique name, so that concurrent saves don't write the same file
+        cache_file = tempfile.NamedTemporaryFile(
+            "w", encoding="utf-8", dir=os.path.dirname(path) or None, suffix=".tmp", delete=False
+        )
+        try:
+            with cache_file:
+                json.dump(cache, cache_file)
+            # replaced at once so concurrent readers never see half the file
+            os.replace(cache_file.name, path)
+        except BaseException:
+            os.unlink(cache_file.name)
+            raise
+
+    def load(self, path: str | os.PathLike[str]) -> int:
+        """Load the definitions of compiled formats from the cache file *path* (see :meth:`save`).
+
+        The regular expressions are still only compiled when first used. The
+        formats already in the registry are left as they are, and the file is
+        ignored if it was saved by another version of trollsift.
+
+        Returns:
+            The number of formats added to the registry.
+
+        """
+        from trollsift import __version__
+
+        with open(path, encoding="utf-8") as cache_file:
+            cache = json.load(cache_file)
+        if cache.get("trollsift_version") != __version__:
+            return 0
+        loaded = 0
+        with self._lock:
+            for fmt, definitions in cache["formats"].items():
+                if fmt not in self._formats:
+                    self._formats[fmt] = _CompiledFormat.from_definitions(fmt, definitions)
+                    loaded += 1
+            self._evict()
+        return loaded
+
+    def __len__(self) -> int:
+        return len(self._formats)
+
+    def __contains__(self, fmt: object) -> bool:
+        return fmt in self._formats
+
+
+format_registry = FormatRegistry()
+
+
+def _compile_format(fmt: str) -> _CompiledFormat:
+    return format_registry.get(fmt)
+
+
+def parse(fmt: str, stri: str | bytes, full_match: bool = True) -> dict[str, Any]:
     """Parse keys and corresponding values from *stri* using format described in *fmt* string.
 
+    *stri* can also be bytes, e.g. a file name listed with
+    ``os.scandir(bytes_path)``. It is then parsed as decoded with
+    :func:`os.fsdecode`, so that names that aren't valid in the file system
+    encoding can be parsed too, and string values are returned as str.
+
     Args:
         fmt: Python format string to match against
         stri: String to extract information from
         full_match: Force the match of the whole string. Default True.
 
     """
-    convdef = get_convert_dict(fmt)
-    keyvals = extract_values(fmt, stri, full_match=full_match)
-    for key in convdef.keys():
-        keyvals[key] = _convert(convdef[key], keyvals[key])
+    return _compile_format(fmt).parse(stri, full_match=full_match)
+
 
-    return keyvals
+def parse_many(
+    fmt: str,
+    strings: Iterable[str | bytes],
+    full_match: bool = True,
+    skip_unmatched: bool = False,
+    workers: int | None = 1,
+    chunksize: int = 10000,
+) -> list[dict[str, Any] | None]:
+    """Parse keys and corresponding values from each string of *strings* using format *fmt*.
+
+    The format is only analysed and compiled once for all the strings, and
+    non-matching strings don't raise an error.
+
+    Args:
+        fmt: Python format string to match against
+        strings: Strings to extract information from, possibly bytes (see
+            :func:`parse`)
+        full_match: Force the match of the whole strings. Default True.
+        skip_unmatched: If True, strings not matching *fmt* are left out of
+            the results. Otherwise (the default) the result is ``None`` for
+            them, so results stay aligned with *strings*.
+        workers: Number of processes to parse the strings in. The default (1)
+            parses in the current process. ``None`` uses as many processes as
+            there are CPUs.
+        chunksize: When using several processes, number of strings sent to a
+            process at once.
+
+    Returns:
+        The parsed keys and values of each string, in order.
+
+    Raises:
+        ValueError: If *workers* or *chunksize* is less than 1.
+
+    """
+    if workers == 1:
+        return list(_compile_format(fmt).parse_iter(strings, full_match=full_match, skip_unmatched=skip_unmatched))
+    return _parse_in_processes(fmt, strings, full_match, skip_unmatched, workers, chunksize)
+
+
+def _parse_in_processes(
+    fmt: str,
+    strings: Iterable[str | bytes],
+    full_match: bool,
+    skip_unmatched: bool,
+    workers: int | None,
+    chunksize: int,
+) -> list[dict[str, Any] | None]:
+    """Parse *strings* in chunks distributed to a pool of *workers* processes.
+
+    Only the format string and the chunks of strings are sent to the
+    processes, each process compiles the format itself. At most two chunks
+    per process are read from *strings* ahead of the results, so that
+    iterators of strings aren't held in memory at once.
+
+    """
+    from concurrent.futures import Future, ProcessPoolExecutor
+
+    if workers is not None and workers < 1:
+        raise ValueError("workers must be at least 1")
+    if chunksize < 1:
+        raise ValueError("chunksize must be at least 1")
+    parse_chunk = partial(_parse_chunk, fmt, full_match=full_match, skip_unmatched=skip_unmatched)
+    strings = iter(strings)
+    chunks = iter(lambda: list(itertools.islice(strings, chunksize)), [])
+    max_pending = 2 * (workers or os.cpu_count() or 1)
+    pending: collections.deque[Future[list[dict[str, Any] | None]]] = collections.deque()
+    results: list[dict[str, Any] | None] = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for chunk in chunks:
+            if len(pending) == max_pending:
+                results.extend(pending.popleft().result())
+            pending.append(executor.submit(parse_chunk, chunk))
+        while pending:
+            results.extend(pending.popleft().result())
+    return results
+
+
+def _parse_chunk(
+    fmt: str, strings: list[str | bytes], full_match: bool = True, skip_unmatched: bool = False
+) -> list[dict[str, Any] | None]:
+    return list(_compile_format(fmt).parse_iter(strings, full_match=full_match, skip_unmatched=skip_unmatched))
+
+
+def _to_records(compiled: _CompiledFormat, results: Iterable[dict[str, Any] | None]) -> Iterator[ParsedRecord | None]:
+    """Convert the dictionaries of parsed values *results* to the records of *compiled*, keeping ``None``."""
+    from_keyvals = compiled.record_type._from_keyvals
+    return (None if keyvals is None else from_keyvals(keyvals) for keyvals in results)
+
+
+def _get_numpy() -> Any:
+    """Get the numpy module if it is installed, None otherwise."""
+    try:
+        return importlib.import_module("numpy")
+    except ImportError:
+        return None
+
+
+def _parse_to_columns(
+    compiled: _CompiledFormat, strings: Iterable[str | bytes], full_match: bool = True
+) -> tuple[list[str | bytes], dict[str, list[Any]]]:
+    """Parse *strings* into a column of values per key, also returning the strings that matched."""
+    matched: list[str | bytes] = []
+    columns: dict[str, list[Any]] = {key: [] for key in compiled.field_types}
+    appends = [(key, column.append) for key, column in columns.items()]
+    strings, strings_to_parse = itertools.tee(strings)
+    for stri, keyvals in zip(strings, compiled.parse_iter(strings_to_parse, full_match=full_match)):
+        if keyvals is None:
+            continue
+        matched.append(stri)
+        for key, append in appends:
+            append(keyvals[key])
+    return matched, columns
+
+
+def _to_array(np: Any, values: list[Any], field_type: type) -> Any:
+    """Convert a column of parsed *values* of type *field_type* to a numpy array."""
+    if field_type is dt.datetime:
+        if any(value.tzinfo is not None for value in values):
+            # numpy doesn't handle time zones
+            return np.array(values, dtype=object)
+        return np.array(values, dtype="datetime64[us]")
+    if field_type is int:
+        try:
+            return np.array(values, dtype=np.int64)
+        except OverflowError:
+            # integers too large for numpy, e.g. long identifiers
+            return np.array(values, dtype=object)
+    if field_type is float:
+        return np.array(values, dtype=np.float64)
+    if field_type is bytes:
+        return np.array(values, dtype=bytes)
+    return np.array(values, dtype=str)
 
 
 def compose(fmt: str, keyvals: Mapping[str, Any], allow_partial: bool = False) -> str:
@@ -519,11 +2653,55 @@ DT_FMT = {
     "%%": "?",
 }
 
+# character classes of the fixed width datetime directives, the others being
+# left as in DT_FMT
+DT_GLOB_CLASSES = {
+    **DT_FMT,
+    "%w": "[0-6]",
+    "%d": "[0-3][0-9]",
+    "%m": "[01][0-9]",
+    "%y": "[0-9][0-9]",
+    "%Y": "[0-9][0-9][0-9][0-9]",
+    "%H": "[0-2][0-9]",
+    "%I": "[01][0-9]",
+    "%M": "[0-5][0-9]",
+    "%S": "[0-6][0-9]",
+    "%j": "[0-3][0-9][0-9]",
+    "%U": "[0-5][0-9]",
+    "%W": "[0-5][0-9]",
+    "%%": "%",
+}
+
+# characters of the numbers of each type, without sign or fill
+GLOB_NUMBER_CHARS = {
+    "d": "0-9",
+    "x": "0-9a-fA-F",
+    "X": "0-9a-fA-F",
+    "o": "0-7",
+    "b": "01",
+    "f": "0-9.",
+    "F": "0-9.",
+}
+
 
 class GlobifyFormatter(string.Formatter):
+    """String formatter that converts a format string to a glob pattern.
+
+    Args:
+        char_classes: If True, the characters of numbers and fixed width
+            datetime directives are matched with character classes (e.g.
+            ``[0-9]``) instead of ``?``, so the pattern matches fewer
+            unrelated strings.
+
+    """
+
     # special string to mark a parameter not being specified
     UNPROVIDED_VALUE = "<trollsift unprovided value>"
 
+    def __init__(self, char_classes: bool = False):
+        self.char_classes = char_classes
+        super(GlobifyFormatter, self).__init__()
+
     def get_value(self, key: str | int, args: Sequence[Any], kwargs: Mapping[str, Any]) -> Any:
         try:
             return super(GlobifyFormatter, self).get_value(key, args, kwargs)
@@ -542,42 +2720,112 @@ class GlobifyFormatter(string.Formatter):
             for fmt_letter in dt_fmt:
                 fmt = "%" + fmt_letter
                 format_spec = format_spec.replace(fmt, value.strftime(fmt))
+            if "%" not in format_spec:
+                # all the directives are known
+                return format_spec
 
         # Replace format spec with glob patterns (*, ?, etc)
         if not format_spec:
             return "*"
         if "%" in format_spec:
             replace_str = format_spec
-            for fmt_key, fmt_val in DT_FMT.items():
+            dt_globs = DT_GLOB_CLASSES if self.char_classes else DT_FMT
+            for fmt_key, fmt_val in dt_globs.items():
                 replace_str = replace_str.replace(fmt_key, fmt_val)
             return replace_str
         if not re.search("[0-9]+", format_spec):
             # non-integer type
             return "*"
-        return "?" * _get_number_from_fmt(format_spec)
+        char_glob = "?"
+        if self.char_classes:
+            char_glob = _get_number_char_class(format_spec) or char_glob
+        return char_glob * _get_number_from_fmt(format_spec)
+
+
+def _get_number_char_class(format_spec: str) -> str | None:
+    """Get the glob character class matching any character of the numbers formatted with *format_spec*.
+
+    Returns:
+        The character class, or None if *format_spec* is not for numbers or
+        if the characters of the numbers are not known.
+
+    """
+    regex_match = fmt_spec_regex.fullmatch(format_spec)
+    if regex_match is None:
+        return None
+    regex_dict = regex_match.groupdict()
+    ftype = regex_dict["type"]
+    if ftype not in GLOB_NUMBER_CHARS or regex_dict["pound"] or regex_dict["comma"]:
+        return None
+    digits = GLOB_NUMBER_CHARS[ftype]
+    extra_chars = ["+"]
+    # zero padding, unless another fill character is given
+    fill: str | None = "0"
+    if not regex_dict["zero"] or regex_dict["fill"] is not None:
+        fill = _get_fill(regex_dict["fill"], regex_dict["width"], ftype)
+    if regex_dict["sign"] == " " or (fill is None and ftype in ("f", "F")):
+        # floats are padded with spaces by default
+        extra_chars.append(" ")
+    if fill is not None and fill != "-" and not re.fullmatch("[" + digits + "]", fill):
+        extra_chars.append(fill)
+    chars = digits + "".join(dict.fromkeys(extra_chars))
+    if "]" in chars:
+        # must be the first character of the class
+        chars = "]" + chars.replace("]", "")
+    # "-" is the last character of the class to not be read as a range
+    return "[" + chars + "-]"
 
 
 globify_formatter = GlobifyFormatter()
+char_class_globify_formatter = GlobifyFormatter(char_classes=True)
 
 
-def globify(fmt: str, keyvals: Mapping[str, Any] | None = None) -> Any:
-    """Generate a string usable with glob.glob() from format string and provided information."""
+def globify(fmt: str, keyvals: Mapping[str, Any] | None = None, char_classes: bool = False) -> Any:
+    """Generate a string usable with glob.glob() from format string and provided information.
+
+    Args:
+        fmt: Python format string to make a glob pattern from
+        keyvals: "Parameter --> parameter value" map of the known parameters.
+            Datetime parameters can be partially known by giving a
+            (datetime, directives) tuple, e.g. ``(start_time, "Ymd")`` to
+            only use the date.
+        char_classes: If True, use character classes (e.g. ``[0-9]``) for
+            the numbers and fixed width datetime directives instead of ``?``,
+            so the pattern matches fewer unrelated files.
+
+    """
     if keyvals is None:
         keyvals = {}
+    if char_classes:
+        return char_class_globify_formatter.format(fmt, **keyvals)
     return globify_formatter.format(fmt, **keyvals)
 
 
-def validate(fmt: str, stri: str) -> bool:
+def validate(fmt: str, stri: str | bytes) -> bool:
     """Validates that string ``stri`` conforms to ``fmt``.
 
     Useful for filtering string, or to check if string is compatible before
     passing the string to the parser function.
     """
-    try:
-        parse(fmt, stri)
-        return True
-    except ValueError:
-        return False
+    return _compile_format(fmt).validate(stri)
+
+
+def validate_many(fmt: str, strings: Iterable[str | bytes]) -> Any:
+    """Validate that each string of ``strings`` conforms to ``fmt``.
+
+    Returns:
+        A boolean NumPy array if NumPy is installed, a list of booleans
+        otherwise.
+
+    """
+    return _to_mask(_compile_format(fmt).validate_iter(strings))
+
+
+def _to_mask(valid: Iterable[bool]) -> Any:
+    np = _get_numpy()
+    if np is None:
+        return list(valid)
+    return np.fromiter(valid, dtype=bool)
 
 
 def _generate_data_for_format(fmt: str) -> dict[str, Any]:
@@ -610,6 +2858,9 @@ def _generate_data_for_format(fmt: str) -> dict[str, Any]:
 
 
 def _gen_data_for_spec(format_spec: str | None) -> int | str | dt.datetime:
+    # only needed here, not worth importing with trollsift
+    import random
+
     if format_spec and "%" in format_spec:
         # some datetime
         t = dt.datetime.now()
@@ -674,6 +2925,39 @@ def is_one2one(fmt: str) -> bool:
     return True
 
 
+def enable_stats(callback: Callable[[str, bool, float, float], Any] | None = None) -> None:
+    """Start collecting statistics on the parsing and validation of strings, for each format.
+
+    For each format, the number of strings parsed or validated, the number
+    of failures, and the time spent matching the regular expression and
+    converting the values are collected (see :class:`FormatStats`), until
+    :func:`disable_stats` is called. Any statistics collected before are
+    reset. When disabled (the default), collecting statistics costs nothing.
+
+    Args:
+        callback: Optional function called after each string is parsed or
+            validated, with the format string, whether it failed, and the
+            time spent matching and converting, in seconds.
+
+    """
+    global _stats_collector
+    with _stats_lock:
+        _collected_stats.clear()
+    _stats_collector = _StatsCollector(callback)
+
+
+def disable_stats() -> None:
+    """Stop collecting statistics. Those collected so far are still available from :func:`get_stats`."""
+    global _stats_collector
+    _stats_collector = None
+
+
+def get_stats() -> dict[str, FormatStats]:
+    """Get a copy of the statistics collected for each format, see :func:`enable_stats`."""
+    with _stats_lock:
+        return {fmt: stats.copy() for fmt, stats in _collected_stats.items()}
+
+
 def purge() -> None:
     """Clear internal caches.
 
@@ -681,13 +2965,12 @@ def purge() -> None:
     is very limited.
 
     """
-    regex_format.cache_clear()
-    get_convert_dict.cache_clear()
+    format_registry.cache_clear()
 
 
 def _strict_compose(fmt: str, keyvals: Mapping[str, Any]) -> str:
     """Convert parameters in `keyvals` to a string based on `fmt` string."""
-    return formatter.format(fmt, **keyvals)
+    return _compile_format(fmt).compose(keyvals)
 
 
 def _partial_compose(fmt: str, keyvals: Mapping[str, Any]) -> str:
@@ -702,31 +2985,189 @@ def _partial_compose(fmt: str, keyvals: Mapping[str, Any]) -> str:
         keyvals (dict): "Parameter --> parameter value" map
 
     """
-    fmt, undefined_vars = _replace_undefined_params_with_placeholders(fmt, keyvals)
-    composed_string = _strict_compose(fmt=fmt, keyvals=keyvals)
-    for fmt_placeholder, fmt_specification in undefined_vars.items():
-        composed_string = composed_string.replace(fmt_placeholder, fmt_specification)
+    return _compile_format(fmt).compose_partial(keyvals)
+
+
+_PATH_SEPARATORS_REGEX = re.compile("[" + re.escape(os.sep + (os.altsep or "")) + "]")
+
 
-    return composed_string
+def _get_path_anchor(fmt: str) -> str:
+    """Get the drive and root *fmt* starts with, e.g. ``/`` or a drive on Windows, if they have no fields."""
+    drive, path = os.path.splitdrive(fmt)
+    anchor = drive + path[: len(path) - len(path.lstrip(os.sep + (os.altsep or "")))]
+    return "" if "{" in anchor or "}" in anchor else anchor
 
 
-def _replace_undefined_params_with_placeholders(
-    fmt: str, keyvals: Mapping[str, Any] | None = None
-) -> tuple[str, dict[str, Any]]:
-    """Replace with placeholders params in `fmt` not specified in `keyvals`."""
-    vars_left_undefined = set(get_convert_dict(fmt).keys())
-    if keyvals is not None:
-        vars_left_undefined -= keyvals.keys()
+def _split_path_format(fmt: str, keyvals: Mapping[str, Any], strict: bool = True) -> list[str]:
+    """Split *fmt* into the format strings of its path components, composing the fields of *keyvals* first.
 
-    undefined_vars_placeholders_dict = {}
-    new_fmt = fmt
-    for var in sorted(vars_left_undefined):
-        matches = set(match.group() for match in re.finditer(rf"{{{re.escape(var)}([^\w{{}}].*?)*}}", new_fmt))
-        if len(matches) == 0:
-            raise ValueError(f"Could not capture definitions for {var} from {fmt}")
-        for var_specification in matches:
-            fmt_placeholder = f"({hex(hash(var_specification))})"
-            undefined_vars_placeholders_dict[fmt_placeholder] = var_specification
-            new_fmt = new_fmt.replace(var_specification, fmt_placeholder)
+    Fields that may contain a path separator are an error if *strict*, and
+    left in their component otherwise.
 
-    return new_fmt, undefined_vars_placeholders_dict
+    """
+    components = [""]
+    for literal_text, field_name, format_spec, conversion in formatter.parse(fmt):
+        text = _escape_braces(literal_text)
+        field = ""
+        if field_name is not None:
+            field = _format_field(field_name, format_spec, conversion)
+            if _get_field_root(field_name) in keyvals:
+                text += _escape_braces(formatter.format(field, **keyvals))
+                field = ""
+            elif strict and _PATH_SEPARATORS_REGEX.search(field):
+                raise ValueError(f"Can't split the field {field} of {fmt} in path components")
+        text_components = _PATH_SEPARATORS_REGEX.split(text)
+        components[-1] += text_components[0]
+        components.extend(text_components[1:])
+        components[-1] += field
+    return components
+
+
+def _compile_path_component(component: str) -> str | _CompiledFormat:
+    """Compile the format of a path component, or get its name if it has no fields."""
+    literal_texts = []
+    for literal_text, field_name, _format_spec, _conversion in formatter.parse(component):
+        if field_name is not None:
+            return _compile_format(component)
+        literal_texts.append(literal_text)
+    return "".join(literal_texts)
+
+
+def _scan_path_component(
+    path: str,
+    component: _CompiledFormat,
+    parsed: dict[str, Any],
+    dt_parts: dict[str, dict[str, int]],
+) -> Iterator[tuple[os.DirEntry[str], dict[str, Any], dict[str, dict[str, int]]]]:
+    """Find the entries of the directory *path* whose names match *component*.
+
+    The values parsed from the names are merged with the *parsed* values of
+    the previous components, see :func:`_merge_path_values`, and the entries
+    whose values disagree with them are left out.
+
+    """
+    try:
+        entries = os.scandir(path or os.curdir)
+    except OSError:
+        # e.g. not a directory, or no permission to read it
+        return
+    with entries:
+        for entry in entries:
+            keyvals = component.try_parse(entry.name)
+            if keyvals is None:
+                continue
+            merged = _merge_path_values(parsed, dt_parts, component, keyvals)
+            if merged is not None:
+                yield entry, *merged
+
+
+# components of datetimes set by the strftime directives, see _build_datetime
+DT_DIRECTIVE_COMPONENTS = {
+    "Y": "year",
+    "y": "year",
+    "m": "month",
+    "b": "month",
+    "B": "month",
+    "d": "day",
+    "j": "julian",
+    "H": "hour",
+    "I": "hour",
+    "M": "minute",
+    "S": "second",
+}
+
+
+def _merge_path_values(
+    parsed: dict[str, Any],
+    dt_parts: dict[str, dict[str, int]],
+    component: _CompiledFormat,
+    component_keyvals: dict[str, Any],
+) -> tuple[dict[str, Any], dict[str, dict[str, int]]] | None:
+    """Merge the values parsed from a path component with the ones of the previous components.
+
+    Returns:
+        The merged values, and the datetime components given by the
+        directives of the datetime values so far. ``None`` if the values
+        disagree.
+
+    """
+    parsed = dict(parsed)
+    dt_parts = dict(dt_parts)
+    for key, value in component_keyvals.items():
+        if not isinstance(value, dt.datetime):
+            if key in parsed and parsed[key] != value:
+                return None
+            parsed[key] = value
+            continue
+        parts = _get_datetime_parts(value, re.findall("%(.)", component.convert_dict[key]))
+        known_parts = dt_parts.get(key)
+        dt_parts[key] = parts if known_parts is None else {**known_parts, **parts}
+        if known_parts is None:
+            parsed[key] = value
+            continue
+        if any(known_parts.get(name, part) != part for name, part in parts.items()):
+            return None
+        try:
+            merged = _build_datetime(dt_parts[key])
+        except ValueError:
+            return None
+        if _get_datetime_parts(merged, dt_parts[key]) != dt_parts[key]:
+            # e.g. a day of the year not matching the day of the month
+            return None
+        parsed[key] = merged
+    return parsed, dt_parts
+
+
+def _get_datetime_parts(value: dt.datetime, names: Iterable[str]) -> dict[str, int]:
+    """Get the components of *value* given by the directive letters or component *names*."""
+    parts = {}
+    for name in names:
+        name = DT_DIRECTIVE_COMPONENTS.get(name, name)
+        if name == "julian":
+            parts[name] = value.timetuple().tm_yday
+        elif name in DT_ARGS:
+            parts[name] = getattr(value, name)
+    return parts
+
+
+def _get_partial_format(fmt: str, provided: frozenset[str]) -> str:
+    """Get the format string composing the *provided* fields of *fmt* and leaving the others unchanged.
+
+    The fields not provided are escaped, so composing the returned format
+    string outputs them as they are written in *fmt*.
+
+    """
+    parts = []
+    for literal_text, field_name, format_spec, conversion in formatter.parse(fmt):
+        parts.append(_escape_braces(literal_text))
+        if field_name is None:
+            continue
+        field = _format_field(field_name, format_spec, conversion)
+        if _get_field_root(field_name) not in provided:
+            field = _escape_braces(field)
+        parts.append(field)
+    return "".join(parts)
+
+
+def _format_field(field_name: str, format_spec: str | None, conversion: str | None) -> str:
+    """Write the replacement field of a format string back from its parts."""
+    field = "{" + field_name
+    if conversion is not None:
+        field += "!" + conversion
+    if format_spec:
+        field += ":" + format_spec
+    return field + "}"
+
+
+def _escape_braces(text: str) -> str:
+    return text.replace("{", "{{").replace("}", "}}")
+
+
+def _get_field_root(field_name: str) -> str:
+    """Get the name of the parameter used by the field *field_name*, i.e. without attribute or item accessors."""
+    root_match = _FIELD_ROOT_REGEX.match(field_name)
+    if root_match is None:
+        raise ValueError(
+            f"Can't compose partially the field {field_name!r}, its name has to be made of word characters"
+        )
+    return root_match.group(1)
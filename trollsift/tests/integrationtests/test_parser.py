@@ -4,6 +4,8 @@ import os
 import unittest
 import datetime as dt
 
+import pytest
+
 from trollsift.parser import Parser
 
 
@@ -28,15 +30,15 @@ class TestParser(unittest.TestCase):
 
     def test_cache_clear(self):
         """Test we can clear the internal cache properly"""
-        from trollsift.parser import purge, regex_format
+        from trollsift.parser import purge, format_registry
 
         # Run
         result = self.p.parse(self.string)
         # Assert
         self.assertDictEqual(result, self.data)
-        assert regex_format.cache_info()[-1] != 0
+        assert format_registry.cache_info()[-1] != 0
         purge()
-        assert regex_format.cache_info()[-1] == 0
+        assert format_registry.cache_info()[-1] == 0
 
     def test_compose(self):
         # Run
@@ -149,3 +151,194 @@ class TestParserVariousFormats(unittest.TestCase):
         p = Parser(fmt)
         result = p.parse(filename)
         self.assertEqual(result["version_number"], "1")
+
+
+class TestParserScan:
+    """Test scanning directories for files matching a format."""
+
+    filenames = [
+        os.path.join("avhrr", "hrpt_noaa16_20140210_1004_69022.l1b"),
+        os.path.join("avhrr", "2014", "hrpt_noaa19_20140212_1412_12345.l1b"),
+        os.path.join("avhrr", "2014", "hrpt_noaa19_20140212_1412_12345.txt"),
+        os.path.join("viirs", "hrpt_npp_20140212_1412_12345.l1b"),
+        "hrpt_noaa18_20140211_1200_55555.l1b",
+    ]
+
+    @pytest.fixture
+    def root(self, tmp_path):
+        for filename in self.filenames:
+            path = tmp_path / filename
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.touch()
+        return str(tmp_path)
+
+    def test_scan_names(self, root):
+        p = Parser("hrpt_{platform:4s}{platnum:2s}_{time:%Y%m%d_%H%M}_{orbit:05d}.l1b")
+        res = dict(p.scan(root))
+        assert sorted(res) == sorted(
+            os.path.join(root, filename) for filename in self.filenames[:2] + self.filenames[4:]
+        )
+        assert res[os.path.join(root, self.filenames[0])] == {
+            "platform": "noaa",
+            "platnum": "16",
+            "time": dt.datetime(2014, 2, 10, 10, 4),
+            "orbit": 69022,
+        }
+
+    def test_scan_not_recursive(self, root):
+        p = Parser("hrpt_{platform:4s}{platnum:2s}_{time:%Y%m%d_%H%M}_{orbit:05d}.l1b")
+        assert [path for path, _keyvals in p.scan(root, recursive=False)] == [os.path.join(root, self.filenames[4])]
+
+    def test_scan_paths(self, root):
+        fmt = os.path.join(root, "{directory}", "hrpt_{platform:4s}{platnum:2s}_{time:%Y%m%d_%H%M}_{orbit:05d}.l1b")
+        res = dict(Parser(fmt).scan(root))
+        assert sorted(res) == sorted(os.path.join(root, filename) for filename in self.filenames[:2])
+        assert res[os.path.join(root, self.filenames[1])]["directory"] == os.path.join("avhrr", "2014")
+
+    def test_scan_current_directory(self, root, monkeypatch):
+        monkeypatch.chdir(root)
+        fmt = os.path.join("{instrument:5s}", "hrpt_{platform:4s}{platnum:2s}_{time:%Y%m%d_%H%M}_{orbit:05d}.l1b")
+        assert [path for path, _keyvals in Parser(fmt).scan()] == [self.filenames[0]]
+
+    def test_scan_bytes(self, root, monkeypatch):
+        p = Parser("hrpt_{platform:4s}{platnum:2s}_{time:%Y%m%d_%H%M}_{orbit:05d}.l1b")
+        res = dict(p.scan(os.fsencode(root)))
+        assert sorted(res) == sorted(
+            os.fsencode(os.path.join(root, filename)) for filename in self.filenames[:2] + self.filenames[4:]
+        )
+        assert res[os.fsencode(os.path.join(root, self.filenames[0]))]["platnum"] == "16"
+        monkeypatch.chdir(root)
+        assert [path for path, _keyvals in p.scan(b"", recursive=False)] == [os.fsencode(self.filenames[4])]
+
+    def test_scan_missing_directory(self, tmp_path):
+        assert list(Parser("{name}.l1b").scan(str(tmp_path / "missing"))) == []
+
+
+class TestParserWalk:
+    """Test walking directory trees for files matching a format."""
+
+    filenames = [
+        os.path.join("noaa19", "2014", "041", "hrpt_noaa19_20140210_1004_69022.l1b"),
+        os.path.join("noaa19", "2014", "041", "hrpt_noaa19_20140210_1004_69022.txt"),
+        os.path.join("noaa19", "2014", "042", "hrpt_noaa19_20140211_1212_12345.l1b"),
+        os.path.join("noaa19", "2015", "041", "hrpt_noaa19_20150210_1004_55555.l1b"),
+        os.path.join("noaa18", "2014", "041", "hrpt_noaa18_20140210_1100_44444.l1b"),
+        os.path.join("noaa18", "misc", "041", "hrpt_noaa18_20140210_1100_44444.l1b"),
+    ]
+    fmt = os.path.join(
+        "{platform}", "{start_time:%Y}", "{start_time:%j}", "hrpt_{platform}_{start_time:%Y%m%d_%H%M}_{orbit:05d}.l1b"
+    )
+
+    @pytest.fixture
+    def root(self, tmp_path):
+        for filename in self.filenames:
+            path = tmp_path / filename
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.touch()
+        return str(tmp_path)
+
+    def test_walk(self, root):
+        res = dict(Parser(self.fmt).walk(root=root))
+        assert sorted(res) == sorted(os.path.join(root, self.filenames[i]) for i in (0, 2, 3, 4))
+        assert res[os.path.join(root, self.filenames[2])] == {
+            "platform": "noaa19",
+            "start_time": dt.datetime(2014, 2, 11, 12, 12),
+            "orbit": 12345,
+        }
+
+    def test_walk_only_reads_matching_directories(self, root, monkeypatch):
+        scanned = []
+        scandir = os.scandir
+
+        def _scandir(path):
+            scanned.append(os.path.relpath(path, root))
+            return scandir(path)
+
+        monkeypatch.setattr(os, "scandir", _scandir)
+        keyvals = {"platform": "noaa19", "start_time": dt.datetime(2014, 2, 10)}
+        fmt = os.path.join(
+            root,
+            "{platform}",
+            "{start_time:%Y}",
+            "{start_time:%j}",
+            "hrpt_{platform}_{start_time:%Y%m%d}_{hour:2s}{minute:2s}_{orbit:05d}.l1b",
+        )
+        res = list(Parser(fmt).walk(keyvals))
+        assert res == [
+            (
+                os.path.join(root, self.filenames[0]),
+                {
+                    "platform": "noaa19",
+                    "start_time": keyvals["start_time"],
+                    "hour": "10",
+                    "minute": "04",
+                    "orbit": 69022,
+                },
+            )
+        ]
+        assert scanned == [os.path.join("noaa19", "2014", "041")]
+
+    def test_walk_keyvals_select_files(self, root):
+        start_time = dt.datetime(2014, 2, 10, 11)
+        res = list(Parser(self.fmt).walk({"start_time": start_time}, root=root))
+        assert res == [
+            (
+                os.path.join(root, self.filenames[4]),
+                {"platform": "noaa18", "start_time": start_time, "orbit": 44444},
+            ),
+        ]
+
+    @pytest.mark.parametrize("keyvals", [None, {"platform": "noaa19"}, {"start_time": dt.datetime(2014, 2, 10, 10, 4)}])
+    def test_walk_skips_values_disagreeing_between_levels(self, root, keyvals):
+        for filename in ("hrpt_noaa18_20140210_1004_11111.l1b", "hrpt_noaa19_20150210_1004_22222.l1b"):
+            open(os.path.join(root, "noaa19", "2014", "041", filename), "w").close()
+        res = dict(Parser(self.fmt).walk(keyvals, root=root))
+        assert os.path.join(root, self.filenames[0]) in res
+        assert not [path for path in res if "11111" in path or "22222" in path]
+
+    def test_walk_combines_datetime_from_levels(self, root):
+        fmt = os.path.join("{platform}", "{start_time:%Y}", "{start_time:%j}", "{start_time:%H%M}.txt")
+        open(os.path.join(root, "noaa19", "2014", "041", "1004.txt"), "w").close()
+        open(os.path.join(root, "noaa19", "2014", "042", "1212.txt"), "w").close()
+        res = sorted(Parser(fmt).walk({"platform": "noaa19"}, root=root))
+        assert res == [
+            (
+                os.path.join(root, "noaa19", "2014", "041", "1004.txt"),
+                {"platform": "noaa19", "start_time": dt.datetime(2014, 2, 10, 10, 4)},
+            ),
+            (
+                os.path.join(root, "noaa19", "2014", "042", "1212.txt"),
+                {"platform": "noaa19", "start_time": dt.datetime(2014, 2, 11, 12, 12)},
+            ),
+        ]
+
+    def test_walk_skips_inconsistent_datetime_levels(self, root):
+        fmt = os.path.join("{platform}", "{start_time:%Y}", "{start_time:%j}", "{start_time:%m%d_%H%M}.txt")
+        open(os.path.join(root, "noaa19", "2014", "041", "0210_1004.txt"), "w").close()
+        open(os.path.join(root, "noaa19", "2014", "041", "0211_1004.txt"), "w").close()
+        res = list(Parser(fmt).walk({"platform": "noaa19"}, root=root))
+        assert res == [
+            (
+                os.path.join(root, "noaa19", "2014", "041", "0210_1004.txt"),
+                {"platform": "noaa19", "start_time": dt.datetime(2014, 2, 10, 10, 4)},
+            ),
+        ]
+
+    def test_walk_relative(self, root, monkeypatch):
+        monkeypatch.chdir(root)
+        res = [path for path, _keyvals in Parser(self.fmt).walk({"platform": "noaa18"})]
+        assert res == [self.filenames[4]]
+
+    def test_walk_absolute(self, root):
+        fmt = os.path.join(os.path.abspath(root), "{platform}", "2014", "041", "hrpt_{platform}_{name}.l1b")
+        res = sorted(path for path, _keyvals in Parser(fmt).walk())
+        assert res == sorted(os.path.join(os.path.abspath(root), self.filenames[i]) for i in (0, 4))
+        assert all(os.path.exists(path) for path in res)
+
+    def test_walk_literal_file(self, root):
+        fmt = os.path.join(root, "noaa19", "{year}", "041", "hrpt_noaa19_20140210_1004_69022.txt")
+        assert list(Parser(fmt).walk()) == [(os.path.join(root, self.filenames[1]), {"year": "2014"})]
+
+    def test_walk_field_with_path_separator(self):
+        with pytest.raises(ValueError):
+            list(Parser(os.path.join("{start_time:%Y/%j}", "{name}.l1b")).walk())
@@ -2,11 +2,23 @@
 
 import unittest
 import datetime as dt
+import re
+import threading
 import pytest
 
 from trollsift.parser import get_convert_dict, extract_values
-from trollsift.parser import _convert
-from trollsift.parser import parse, globify, validate, is_one2one, compose, Parser
+from trollsift.parser import _convert, _get_converter, _get_datetime_converter
+from trollsift.parser import (
+    parse,
+    parse_many,
+    globify,
+    validate,
+    validate_many,
+    is_one2one,
+    compose,
+    Parser,
+    PatternSet,
+)
 
 
 class TestParser(unittest.TestCase):
@@ -171,6 +183,24 @@ class TestParser(unittest.TestCase):
         self.assertEqual(_convert("_>10d", "_____69022"), 69022)
         self.assertEqual(_convert("%Y%m%d_%H%M", "20140210_1004"), dt.datetime(2014, 2, 10, 10, 4))
 
+    def test_get_converter(self):
+        self.assertIsNone(_get_converter(""))
+        self.assertIsNone(_get_converter("4s"))
+        self.assertEqual(_get_converter("_<6s")("EFR___"), "EFR")
+        self.assertEqual(_get_converter("05d")("00022"), 22)
+        self.assertEqual(_get_converter("_>4o")("_173"), 123)
+        self.assertEqual(_get_converter("%Y%m%d_%H%M")("20140210_1004"), dt.datetime(2014, 2, 10, 10, 4))
+
+    def test_parser_compiles_once(self):
+        from trollsift.parser import format_registry, purge
+
+        parser = Parser(self.fmt)
+        purge()
+        parser.parse(self.string)
+        parser.parse(self.string2)
+        info = format_registry.cache_info()
+        assert (info.hits, info.misses) == (0, 1)
+
     def test_parse(self):
         # Run
         result = parse(self.fmt, "/somedir/avhrr/2014/hrpt_noaa19_20140212_1412_12345.l1b")
@@ -342,6 +372,10 @@ class TestParser(unittest.TestCase):
         # Assert
         self.assertEqual(result, "hrpt_noaa??_20140210_????_*.l1b")
 
+    def test_globify_partial_datetime_all_known(self):
+        result = globify("hrpt_{time:%Y%m%d}_{orbit}.l1b", {"time": (dt.datetime(2014, 2, 10, 12, 12), "YmdH")})
+        self.assertEqual(result, "hrpt_20140210_*.l1b")
+
     def test_globify_datetime_nosub(self):
         # Run
         result = globify(
@@ -352,6 +386,36 @@ class TestParser(unittest.TestCase):
         # Assert
         self.assertEqual(result, "hrpt_noaa??_????????_????_*.l1b")
 
+    def test_globify_char_classes(self):
+        # Run
+        result = globify(
+            "hrpt_{platform:4s}{satnum:2d}_{time:%Y%m%d_%H%M}_{orbit:05d}_{angle:4.1f}_{ms:%f}.l1b",
+            {"platform": "noaa", "time": (dt.datetime(2014, 2, 10, 12, 12), "Ymd")},
+            char_classes=True,
+        )
+        # Assert
+        self.assertEqual(
+            result,
+            "hrpt_noaa"
+            + "[0-9+ -]" * 2
+            + "_20140210_[0-2][0-9][0-5][0-9]_"
+            + "[0-9+-]" * 5
+            + "_"
+            + "[0-9.+ -]" * 4
+            + "_*.l1b",
+        )
+
+    def test_globify_char_classes_match_composed_strings(self):
+        import fnmatch
+
+        fmt = "{a:x>4x}_{b:]^5o}_{c:+04d}_{d: 4d}_{e:%Y%j_%I%p%%}_{f:#4x}_{g:2s}"
+        keyvals = {"a": 255, "b": 7, "c": -3, "d": 12, "e": dt.datetime(2014, 2, 10, 12), "f": 10, "g": "ab"}
+        pattern = Parser(fmt).globify(char_classes=True)
+        composed = compose(fmt, keyvals)
+        assert fnmatch.fnmatchcase(composed, pattern)
+        assert pattern.endswith("_????_??")
+        assert not fnmatch.fnmatchcase(composed.replace("_-003_", "_abcd_"), pattern)
+
     def test_validate(self):
         # These cases are True
         self.assertTrue(validate(self.fmt, "/somedir/avhrr/2014/hrpt_noaa19_20140212_1412_12345.l1b"))
@@ -396,6 +460,982 @@ class TestParser(unittest.TestCase):
         self.assertEqual(exp, res_dict)
 
 
+class TestDatetimeConversion:
+    """Test the conversion of parsed strings to datetimes."""
+
+    @pytest.mark.parametrize(
+        ("convdef", "stri"),
+        [
+            ("%Y%m%d_%H%M%S", "20140210_100405"),
+            ("%Y-%m-%dT%H:%M:%S", "2014-02-10T10:04:05"),
+            ("%Y%j", "2016366"),
+            ("%Y%j%H%M", "20170011200"),
+            ("%y%m%d", "690101"),
+            ("%y%m%d", "680101"),
+            ("%H%M", "2359"),
+            ("%m%d", "0131"),
+            ("%d-%b-%Y_%H:%M:%S.000", "26-NOV-2014_10:12:00.000"),
+            ("%Y%m%d%H%M%S%f", "20120225180124500000"),
+            ("%Y%m%d", "2014021"),
+            ("%Y-%m-%d", "2014-02-10"),
+            ("%Y%m%d_%H%M", "20141231_2359"),
+            ("%Y-%m-%d %H:%M", "2016-02-29 00:00"),
+        ],
+    )
+    def test_same_as_strptime(self, convdef, stri):
+        assert _get_datetime_converter(convdef)(stri) == dt.datetime.strptime(stri, convdef)
+
+    @pytest.mark.parametrize(
+        ("convdef", "stri"),
+        [
+            ("%Y%m%d", "20141310"),
+            ("%Y%m%d", "20140230"),
+            ("%Y%m%d", "2014021x"),
+            ("%H%M%S", "240000"),
+            ("%Y%j", "2014000"),
+            ("%Y%j%m", "201400113"),
+            ("%Y%m%d_%H%M", "20140210-1004"),
+            ("%Y%m%d_%H%M", "20140210_2400"),
+            ("%Y-%m-%dT%H:%M:%S", "2014-02-10T10:04:60"),
+            ("%Y-%m-%d", "2014-02-29"),
+        ],
+    )
+    @pytest.mark.parametrize("matched", [False, True])
+    def test_same_errors_as_strptime(self, convdef, stri, matched):
+        from trollsift.parser import RegexFormatter
+
+        if matched and not re.fullmatch(RegexFormatter()._regex_datetime(convdef), stri):
+            pytest.skip("Not matching the regular expression of the field")
+        with pytest.raises(ValueError) as strptime_error:
+            dt.datetime.strptime(stri, convdef)
+        with pytest.raises(ValueError) as error:
+            _get_datetime_converter(convdef, matched=matched)(stri)
+        assert str(error.value) == str(strptime_error.value)
+
+    @pytest.mark.parametrize(
+        ("convdef", "expected"),
+        [
+            ("%Y-%m-%dT%H:%M:%S", True),
+            ("%Y-%m-%d", True),
+            ("%Y%j", False),
+            ("%d%m%Y", False),
+            ("%y%m%d", False),
+        ],
+    )
+    def test_parses_as_isoformat(self, convdef, expected):
+        from trollsift.parser import _parses_as_isoformat
+
+        assert _parses_as_isoformat(convdef, lambda stri: dt.datetime.strptime(stri, convdef)) is expected
+
+    def test_matched_skips_layout_check(self):
+        converter = _get_datetime_converter("%Y%m%d_%H%M", matched=True)
+        assert converter("20140210_1004") == dt.datetime(2014, 2, 10, 10, 4)
+        # not checked again, the regular expression of the field being more strict
+        assert _get_datetime_converter("%Y.%m", matched=True)("2014.02") == dt.datetime(2014, 2, 1)
+        with pytest.raises(ValueError):
+            _get_datetime_converter("%Y.%m", matched=True)("2014x02")
+
+    def test_fixed_width_does_not_use_strptime(self):
+        converter = _get_datetime_converter("%Y%m%d_%H%M")
+        assert converter.__name__ != "_strptime"
+        assert converter("20140210_1004") == dt.datetime(2014, 2, 10, 10, 4)
+        assert _get_datetime_converter("%Y%m%d_%H%M%p").__name__ == "_strptime"
+
+
+class TestFormatRegistry:
+    """Test the registry of compiled formats."""
+
+    def test_lru_eviction(self):
+        from trollsift.parser import FormatRegistry
+
+        registry = FormatRegistry(maxsize=2)
+        compiled = registry.get("{a}")
+        registry.get("{b}")
+        assert registry.get("{a}") is compiled
+        registry.get("{c}")
+        assert "{a}" in registry
+        assert "{b}" not in registry
+        assert registry.cache_info() == (1, 3, 1, 2, 0, 2)
+
+    def test_fifo_eviction(self):
+        from trollsift.parser import FormatRegistry
+
+        registry = FormatRegistry(maxsize=2, policy="fifo")
+        registry.get("{a}")
+        registry.get("{b}")
+        registry.get("{a}")
+        registry.get("{c}")
+        assert "{a}" not in registry
+        assert "{b}" in registry
+
+    def test_pinned_formats_are_not_evicted(self):
+        from trollsift.parser import FormatRegistry
+
+        registry = FormatRegistry(maxsize=1)
+        registry.pin("{a}")
+        registry.pin("{a}")
+        registry.get("{a}")
+        registry.get("{b}")
+        assert "{a}" in registry
+        assert "{b}" not in registry
+        registry.unpin("{a}")
+        registry.get("{b}")
+        assert "{a}" in registry
+        assert registry.cache_info().pinned == 1
+        registry.unpin("{a}")
+        assert registry.cache_info().pinned == 0
+        registry.get("{b}")
+        assert "{a}" not in registry
+
+    def test_configure(self):
+        from trollsift.parser import FormatRegistry
+
+        registry = FormatRegistry(maxsize=None)
+        for fmt in ("{a}", "{b}", "{c}"):
+            registry.get(fmt)
+        registry.configure(maxsize=1)
+        assert len(registry) == 1
+        assert registry.cache_info().evictions == 2
+        registry.configure(policy="fifo")
+        assert registry.maxsize == 1
+        registry.configure(maxsize=0)
+        registry.get("{a}")
+        assert len(registry) == 0
+        with pytest.raises(ValueError):
+            registry.configure(policy="random")
+        with pytest.raises(ValueError):
+            registry.configure(maxsize=-1)
+
+    def test_cache_clear(self):
+        from trollsift.parser import FormatRegistry
+
+        registry = FormatRegistry()
+        registry.pin("{a}")
+        registry.get("{a}")
+        registry.get("{a}")
+        registry.cache_clear()
+        assert registry.cache_info() == (0, 0, 0, 1024, 0, 0)
+        registry.get("{a}")
+        assert registry.cache_info().pinned == 1
+
+    def test_save_and_load(self, tmp_path, monkeypatch):
+        from trollsift.parser import FormatRegistry, RegexFormatter
+
+        fmt = "hrpt_{platform:4s}{platnum:2s}_{time:%Y%m%d_%H%M}_{orbit:05d}.l1b"
+        string = "hrpt_noaa19_20140212_1412_12345.l1b"
+        registry = FormatRegistry()
+        expected = registry.get(fmt).parse(string)
+        registry.get("{a!l}").compose({"a": "A"})
+        registry.save(tmp_path / "formats.json")
+
+        def _fail(*args, **kwargs):
+            raise AssertionError("The regular expression should not be generated again")
+
+        monkeypatch.setattr(RegexFormatter, "format", _fail)
+        registry = FormatRegistry()
+        registry.get("{a!l}")
+        assert registry.load(tmp_path / "formats.json") == 1
+        compiled = registry.get(fmt)
+        assert "pattern" not in vars(compiled)
+        assert compiled.parse(string) == expected
+        assert compiled.compose(expected) == string
+
+    def test_save_concurrently(self, tmp_path):
+        from concurrent.futures import ThreadPoolExecutor
+
+        from trollsift.parser import FormatRegistry
+
+        registry = FormatRegistry()
+        registry.get("{a}_{b}").parse("x_y")
+        with ThreadPoolExecutor(8) as executor:
+            # result() raises the errors of the threads
+            list(executor.map(registry.save, [tmp_path / "formats.json"] * 32))
+        assert [path.name for path in tmp_path.iterdir()] == ["formats.json"]
+        assert FormatRegistry().load(tmp_path / "formats.json") == 1
+
+    def test_save_failing(self, tmp_path, monkeypatch):
+        from trollsift.parser import FormatRegistry, _CompiledFormat
+
+        registry = FormatRegistry()
+        registry.get("{a}")
+        monkeypatch.setattr(_CompiledFormat, "get_definitions", lambda self: {"regex": object()})
+        with pytest.raises(TypeError):
+            registry.save(tmp_path / "formats.json")
+        assert list(tmp_path.iterdir()) == []
+
+    def test_load_other_version(self, tmp_path):
+        import json
+
+        from trollsift.parser import FormatRegistry
+
+        path = tmp_path / "formats.json"
+        path.write_text(json.dumps({"trollsift_version": "0.0.1", "formats": {"{a}": {"regex": "(?P<a>b)"}}}))
+        registry = FormatRegistry()
+        assert registry.load(path) == 0
+        assert len(registry) == 0
+
+    def test_parser_pin(self):
+        import gc
+
+        from trollsift.parser import format_registry
+
+        fmt = "{platform}_{pinned_parser_test}.dat"
+        parser = Parser(fmt, pin=True)
+        parser.parse("noaa19_x.dat")
+        assert format_registry.cache_info().pinned >= 1
+        format_registry.configure(maxsize=0)
+        try:
+            assert fmt in format_registry
+            del parser
+            gc.collect()
+            assert fmt not in format_registry
+        finally:
+            format_registry.configure(maxsize=1024)
+
+
+class TestParseMany:
+    """Test parsing of several strings at once."""
+
+    fmt = "hrpt_{platform:4s}{platnum:2s}_{time:%Y%m%d_%H%M}_{orbit:05d}.l1b"
+    strings = [
+        "hrpt_noaa19_20140212_1412_12345.l1b",
+        "hrpt_noaa19_20140212_1412_12345.l1b.bak",
+        "hrpt_noaa16_20140210_1004_69022.l1b",
+        "hrpt_noaa16_20141310_1004_69022.l1b",
+    ]
+    expected = [
+        {"platform": "noaa", "platnum": "19", "time": dt.datetime(2014, 2, 12, 14, 12), "orbit": 12345},
+        {"platform": "noaa", "platnum": "16", "time": dt.datetime(2014, 2, 10, 10, 4), "orbit": 69022},
+    ]
+
+    def test_parse_many(self):
+        """Test that non-matching strings give None by default."""
+        res = parse_many(self.fmt, self.strings)
+        assert res == [self.expected[0], None, self.expected[1], None]
+
+    def test_parse_many_skip_unmatched(self):
+        res = parse_many(self.fmt, self.strings, skip_unmatched=True)
+        assert res == self.expected
+
+    def test_parse_many_not_full_match(self):
+        res = parse_many(self.fmt, self.strings, full_match=False, skip_unmatched=True)
+        assert res == [self.expected[0], self.expected[0], self.expected[1]]
+
+    @pytest.mark.parametrize("chunksize", [1, 3, 10000])
+    def test_parse_many_in_processes(self, chunksize):
+        res = parse_many(self.fmt, iter(self.strings * 3), workers=2, chunksize=chunksize)
+        assert res == [self.expected[0], None, self.expected[1], None] * 3
+        res = Parser(self.fmt).parse_many(self.strings, skip_unmatched=True, workers=2, chunksize=chunksize)
+        assert res == self.expected
+
+    @pytest.mark.parametrize(("workers", "chunksize"), [(2, 0), (2, -1), (0, 10)])
+    def test_parse_many_in_processes_invalid(self, workers, chunksize):
+        with pytest.raises(ValueError):
+            parse_many(self.fmt, self.strings, workers=workers, chunksize=chunksize)
+
+    def test_parser_parse_iter_is_lazy(self):
+        def _strings():
+            yield self.strings[0]
+            raise AssertionError("Consumed too many strings")
+
+        results = Parser(self.fmt).parse_iter(_strings())
+        assert next(results) == self.expected[0]
+
+    def test_parser_parse_many(self):
+        res = Parser(self.fmt).parse_many(iter(self.strings), skip_unmatched=True)
+        assert res == self.expected
+
+
+class TestParsedRecord:
+    """Test parsing into records instead of dictionaries."""
+
+    fmt = "hrpt_{platform:4s}{platnum:2s}_{time:%Y%m%d_%H%M}_{orbit:05d}.l1b"
+    string = "hrpt_noaa19_20140212_1412_12345.l1b"
+    expected = {"platform": "noaa", "platnum": "19", "time": dt.datetime(2014, 2, 12, 14, 12), "orbit": 12345}
+
+    def test_parse(self):
+        record = Parser(self.fmt).parse(self.string, as_record=True)
+        assert record.orbit == 12345
+        assert record.time == dt.datetime(2014, 2, 12, 14, 12)
+        assert record["platnum"] == "19"
+        assert record.get("channel") is None
+        assert record == self.expected
+        assert dict(record) == self.expected
+        assert list(record) == list(self.expected)
+        assert len(record) == 4
+        assert repr(record).startswith("ParsedRecord(platform='noaa', platnum='19', time=datetime.datetime(")
+        with pytest.raises(KeyError):
+            record["keys"]
+        with pytest.raises(AttributeError):
+            record.channel = "4"
+
+    def test_same_type_for_a_format(self):
+        from trollsift.parser import ParsedRecord
+
+        record = Parser(self.fmt).parse(self.string, as_record=True)
+        other = Parser(self.fmt).parse(self.string.replace("19", "18", 1), as_record=True)
+        assert type(record) is type(other)
+        assert isinstance(record, ParsedRecord)
+        assert type(Parser("{orbit:05d}").parse("12345", as_record=True)) is not type(record)
+
+    def test_parse_many(self):
+        strings = [self.string, "README.txt"]
+        records = Parser(self.fmt).parse_many(strings, as_record=True)
+        assert records == [self.expected, None]
+        assert records[0].platform == "noaa"
+        records = list(Parser(self.fmt).parse_iter(iter(strings), skip_unmatched=True, as_record=True))
+        assert records == [self.expected]
+        records = Parser(self.fmt).parse_many(strings * 2, workers=2, chunksize=1, as_record=True)
+        assert records == [self.expected, None] * 2
+        assert records[2].orbit == 12345
+
+    def test_pickle(self):
+        import pickle
+
+        record = Parser(self.fmt).parse(self.string, as_record=True)
+        unpickled = pickle.loads(pickle.dumps(record))
+        assert unpickled == record
+        assert type(unpickled) is type(record)
+
+    @pytest.mark.parametrize("fmt", ["{keys}_{orbit:05d}", "{_fmt}_{orbit:05d}", "{get}_{orbit:05d}"])
+    def test_invalid_attribute_names(self, fmt):
+        parser = Parser(fmt)
+        assert parser.parse("a_12345")["orbit"] == 12345
+        with pytest.raises(ValueError):
+            parser.parse("a_12345", as_record=True)
+
+
+class TestParseColumns:
+    """Test parsing of several strings into columns."""
+
+    fmt = "hrpt_{platform:4s}{platnum:2s}_{time:%Y%m%d_%H%M}_{orbit:05d}_{angle:5.2f}.l1b"
+    strings = [
+        "hrpt_noaa19_20140212_1412_12345_12.34.l1b",
+        "README.txt",
+        "hrpt_noaa16_20140210_1004_69022_-1.23.l1b",
+    ]
+
+    def test_parse_columns_without_numpy(self, monkeypatch):
+        import trollsift.parser
+
+        monkeypatch.setattr(trollsift.parser, "_get_numpy", lambda: None)
+        columns = Parser(self.fmt).parse_columns(self.strings)
+        assert columns == {
+            "platform": ["noaa", "noaa"],
+            "platnum": ["19", "16"],
+            "time": [dt.datetime(2014, 2, 12, 14, 12), dt.datetime(2014, 2, 10, 10, 4)],
+            "orbit": [12345, 69022],
+            "angle": [12.34, -1.23],
+        }
+
+    def test_parse_columns_with_numpy(self):
+        np = pytest.importorskip("numpy")
+        columns = Parser(self.fmt).parse_columns(iter(self.strings))
+        assert columns["platform"].dtype.kind == "U"
+        np.testing.assert_array_equal(columns["platnum"], ["19", "16"])
+        assert columns["time"].dtype == np.dtype("datetime64[us]")
+        np.testing.assert_array_equal(
+            columns["time"], np.array(["2014-02-12T14:12", "2014-02-10T10:04"], dtype="datetime64[us]")
+        )
+        assert columns["orbit"].dtype == np.int64
+        np.testing.assert_array_equal(columns["orbit"], [12345, 69022])
+        assert columns["angle"].dtype == np.float64
+        np.testing.assert_allclose(columns["angle"], [12.34, -1.23])
+
+    def test_parse_columns_with_numpy_large_integers(self):
+        np = pytest.importorskip("numpy")
+        large = 123456789012345678901234
+        columns = Parser("{id:d}.txt").parse_columns([f"{large}.txt", "1.txt"])
+        assert columns["id"].dtype == object
+        np.testing.assert_array_equal(columns["id"], [large, 1])
+
+    def test_parse_columns_with_numpy_no_match(self):
+        pytest.importorskip("numpy")
+        columns = Parser(self.fmt).parse_columns(["README.txt"])
+        assert all(column.size == 0 for column in columns.values())
+        assert columns["time"].dtype.kind == "M"
+
+    def test_parse_columns_strings_key(self, monkeypatch):
+        import trollsift.parser
+
+        monkeypatch.setattr(trollsift.parser, "_get_numpy", lambda: None)
+        columns = Parser(self.fmt).parse_columns(self.strings, strings_key="filename")
+        assert columns["filename"] == [self.strings[0], self.strings[2]]
+        assert columns["orbit"] == [12345, 69022]
+        with pytest.raises(ValueError):
+            Parser(self.fmt).parse_columns(self.strings, strings_key="orbit")
+
+
+class TestValidateMany:
+    """Test validating several strings at once."""
+
+    fmt = "hrpt_{platform:4s}{platnum:2s}_{time:%Y%m%d_%H%M}_{orbit:05d}.l1b"
+    strings = [
+        "hrpt_noaa19_20140212_1412_12345.l1b",
+        "README.txt",
+        "hrpt_noaa19_20141312_1412_12345.l1b",
+        "hrpt_noaa19_20140212_1412_1A345.l1b",
+        "hrpt_noaa16_20140210_1004_69022.l1b",
+    ]
+    expected = [True, False, False, False, True]
+
+    def test_validate_many_without_numpy(self, monkeypatch):
+        import trollsift.parser
+
+        monkeypatch.setattr(trollsift.parser, "_get_numpy", lambda: None)
+        assert Parser(self.fmt).validate_many(self.strings) == self.expected
+        assert validate_many(self.fmt, iter(self.strings)) == self.expected
+
+    def test_validate_many_with_numpy(self):
+        np = pytest.importorskip("numpy")
+        mask = Parser(self.fmt).validate_many(iter(self.strings))
+        assert mask.dtype == np.bool_
+        np.testing.assert_array_equal(mask, self.expected)
+        np.testing.assert_array_equal(validate_many(self.fmt, []), np.array([], dtype=bool))
+
+    @pytest.mark.parametrize("fmt", ["{a!l}_x", "{a:5=s}", "{a:4d}_{a:5d}"])
+    def test_validate_invalid_format(self, fmt):
+        """Test that nothing is valid against a format that can't be turned into a regex."""
+        assert not validate(fmt, "1234_12345")
+        assert not Parser(fmt).validate("1234_12345")
+        assert list(validate_many(fmt, ["a_x", "1234_12345"])) == [False, False]
+
+    def test_validate_only_converts_unchecked_fields(self, monkeypatch):
+        """Test that string fields are only checked by the regular expression."""
+        import trollsift.parser
+
+        converted = []
+
+        def _get_converter(convdef, **kwargs):
+            converter = _get_converter_orig(convdef, **kwargs)
+            if converter is None:
+                return None
+            return lambda stri: converted.append(stri) or converter(stri)
+
+        _get_converter_orig = trollsift.parser._get_converter
+        monkeypatch.setattr(trollsift.parser, "_get_converter", _get_converter)
+        trollsift.parser.purge()
+        fmt = "{directory:>10s}/{platform:4s}_{orbit:5d}"
+        assert Parser(fmt).validate("     mydir/noaa_   12")
+        assert converted == ["   12"]
+        assert not Parser(fmt).validate("     mydir/noaa_1 2 3")
+
+
+class TestBytes:
+    """Test parsing and validating strings given as bytes."""
+
+    fmt = "hrpt_{platform:4s}{platnum:2s}_{time:%Y%m%d_%H%M}_{orbit:05d}.l1b"
+    strings = [
+        b"hrpt_noaa19_20140212_1412_12345.l1b",
+        b"README.txt",
+        "hrpt_noaa16_20140210_1004_69022.l1b",
+        b"hrpt_noaa19_20141312_1412_12345.l1b",
+    ]
+    expected = [
+        {"platform": "noaa", "platnum": "19", "time": dt.datetime(2014, 2, 12, 14, 12), "orbit": 12345},
+        None,
+        {"platform": "noaa", "platnum": "16", "time": dt.datetime(2014, 2, 10, 10, 4), "orbit": 69022},
+        None,
+    ]
+
+    def test_parse(self):
+        assert parse(self.fmt, self.strings[0]) == self.expected[0]
+        assert Parser(self.fmt).parse(self.strings[0] + b".bak", full_match=False) == self.expected[0]
+        with pytest.raises(ValueError):
+            parse(self.fmt, self.strings[1])
+
+    def test_parse_undecodable(self):
+        """Test that bytes not valid in the file system encoding are parsed as with os.fsdecode."""
+        import os
+
+        stri = b"hrpt_noa\xff19_20140212_1412_12345.l1b"
+        res = parse(self.fmt, stri)
+        assert res["platform"] == os.fsdecode(b"noa\xff")
+        assert os.fsencode(res["platform"]) == b"noa\xff"
+
+    def test_parse_many(self):
+        assert parse_many(self.fmt, self.strings) == self.expected
+        assert Parser(self.fmt).parse_many(iter(self.strings), skip_unmatched=True) == self.expected[::2]
+
+    def test_validate(self):
+        assert validate(self.fmt, self.strings[0])
+        assert not Parser(self.fmt).validate(self.strings[3])
+        assert list(validate_many(self.fmt, self.strings)) == [True, False, True, False]
+
+    def test_parse_columns_strings_key(self):
+        np = pytest.importorskip("numpy")
+        columns = Parser(self.fmt).parse_columns(self.strings[::3], strings_key="filename")
+        assert columns["filename"].dtype.kind == "S"
+        np.testing.assert_array_equal(columns["filename"], self.strings[:1])
+        np.testing.assert_array_equal(columns["platnum"], ["19"])
+
+    def test_stats(self):
+        from trollsift.parser import disable_stats, enable_stats, get_stats
+
+        enable_stats()
+        try:
+            assert parse_many(self.fmt, self.strings) == self.expected
+            assert Parser(self.fmt).validate(self.strings[0])
+            assert not Parser(self.fmt).validate(self.strings[1])
+            fmt_stats = get_stats()[self.fmt]
+        finally:
+            disable_stats()
+        assert (fmt_stats.calls, fmt_stats.failures) == (6, 3)
+
+
+class TestSegmentPattern:
+    """Test matching formats with several fields of unspecified width without backtracking."""
+
+    @pytest.mark.parametrize(
+        ("fmt", "stri"),
+        [
+            ("{a}_{b}_{c}.txt", "x_y_z_w.txt"),
+            ("{a}_{b}_{c}.txt", "x_y.txt"),
+            ("{a}_{time:%Y%m%d}_{b}.nc", "x_y_20140101_z_w.nc"),
+            ("{a}_{time:%Y%m%d}_{b}.nc", "x_y_2014010_z_w.nc"),
+            ("{a}{b}", "xyz"),
+            ("{a:s}_{b:s}.txt", "a_b c.txt"),
+            ("{a:s}_{b}.txt", "a_b c.txt"),
+            ("{a} {b:s}_{c:s}", "a b_c d_e"),
+            ("{a}_{x:4s}{b}z", "q_abcdefz"),
+            ("{a}_{b}.txt", "a_b.txt\n"),
+            ("{a}_{b}", "a_b\nc"),
+            ("{a}_{b:d}_{c}.txt", "x_1_y_12_z.txt"),
+            ("{a}_{b:d}_{c}.txt", "x_-1_+2_z.txt"),
+            ("{a:d}{b}", "-12x"),
+            ("{a:d}-{b:d}", "-1--2"),
+            ("{a:o}{b}{c:b}", "17x-101"),
+        ],
+    )
+    @pytest.mark.parametrize("full_match", [True, False])
+    @pytest.mark.parametrize("regex_max_cost", [-1, 10**9])
+    def test_same_as_regex(self, fmt, stri, full_match, regex_max_cost, monkeypatch):
+        import trollsift.parser
+        from trollsift.parser import _get_segment_pattern, regex_format
+
+        monkeypatch.setattr(trollsift.parser, "REGEX_MAX_COST", regex_max_cost)
+        regex = re.compile(("^{}$" if full_match else "{}").format(regex_format(fmt)))
+        pattern = _get_segment_pattern(fmt, regex, full_match=full_match)
+        regex_match = regex.match(stri)
+        expected = None if regex_match is None else regex_match.groupdict()
+        segment_match = pattern.match(stri)
+        assert (None if segment_match is None else segment_match.groupdict()) == expected
+
+    @pytest.mark.parametrize("fmt", ["{a}.txt", "{a}_{b:x}_{c}.txt", "{a}_{b:4.2f}_{c}.txt", "{a}_{b}_{a}.txt"])
+    def test_not_used(self, fmt):
+        from trollsift.parser import _compile_format
+
+        assert isinstance(_compile_format(fmt).pattern, re.Pattern)
+
+    @pytest.mark.parametrize("fmt", ["{a}_{b}_{c}_{d}.txt", "{a:s}_{b:s}_{c}_{d:s}.txt", "{a}_{b:d}_{c}_{d}.txt"])
+    @pytest.mark.parametrize(
+        "stri", ["x_" * 5000 + "y", "x_ " * 5000 + "y", "x_" * 5000 + " y", "x_\n" * 5000, "_1" * 5000 + "x"]
+    )
+    def test_nearly_matching_long_strings(self, fmt, stri):
+        from trollsift.parser import _get_segment_pattern, regex_format
+
+        class _CountingPattern:
+            """Pattern counting the searches, the regular expression would take hours here."""
+
+            def __init__(self, pattern):
+                self._pattern = pattern
+                self.pattern = pattern.pattern
+                self.groupindex = pattern.groupindex
+                self.calls = 0
+
+            def search(self, *args):
+                self.calls += 1
+                return self._pattern.search(*args)
+
+            def match(self, *args):
+                self.calls += 1
+                return self._pattern.match(*args)
+
+        pattern = _get_segment_pattern(fmt, re.compile("^{}$".format(regex_format(fmt))))
+        pattern.regex = None
+        pattern.head = _CountingPattern(pattern.head)
+        pattern.fields = [
+            (name, stop, _CountingPattern(segment), *rest) for name, stop, segment, *rest in pattern.fields
+        ]
+        assert pattern.match(stri) is None
+        calls = pattern.head.calls + sum(segment.calls for _name, _stop, segment, *_rest in pattern.fields)
+        assert calls <= 2 * len(stri)
+        assert not validate(fmt, stri)
+
+    def test_integer_field(self):
+        from trollsift.parser import _SegmentPattern, _compile_format
+
+        fmt = "{a}_{b:d}_{c}_{d}.txt"
+        assert isinstance(_compile_format(fmt).pattern, _SegmentPattern)
+        assert parse(fmt, "x_y_-12_z_w.txt") == {"a": "x_y", "b": -12, "c": "z", "d": "w"}
+
+    def test_parse(self):
+        fmt = "{platform}_{sensor}_{time:%Y%m%d_%H%M}_{orbit:05d}_{name}.nc"
+        stri = "noaa_19_avhrr_3_20140210_1004_12345_" + "long_name_" * 10 + ".nc"
+        assert parse(fmt, stri) == {
+            "platform": "noaa",
+            "sensor": "19_avhrr_3",
+            "time": dt.datetime(2014, 2, 10, 10, 4),
+            "orbit": 12345,
+            "name": "long_name_" * 10,
+        }
+        assert parse(fmt, stri + "x", full_match=False)["name"] == "long_name_" * 10
+
+    def test_pattern_set(self):
+        fmts = ["{a}_{b}_{c}.txt", "{a}-{b}.txt", "{x}.txt"]
+        patterns = PatternSet(fmts)
+        stri = "x" * 100 + "_y_z.txt"
+        assert patterns.match(stri) == (fmts[0], {"a": "x" * 100, "b": "y", "c": "z"})
+        assert [fmt for fmt, _keyvals in patterns.match_all(stri)] == [fmts[0], fmts[2]]
+        assert patterns.match("x_" * 5000) is None
+
+
+class TestPickle:
+    """Test pickling parsers, e.g. to send them to other processes."""
+
+    fmt = "hrpt_{platform:4s}{platnum:2s}_{time:%Y%m%d_%H%M}_{orbit:05d}.l1b"
+    string = "hrpt_noaa19_20140212_1412_12345.l1b"
+
+    def test_pickle_parser(self):
+        import pickle
+
+        from trollsift.parser import _compile_format
+
+        p = Parser(self.fmt)
+        expected = p.parse(self.string)
+        dumped = pickle.dumps(p)
+        assert len(dumped) < len(self.fmt) + 100
+        loaded = pickle.loads(dumped)
+        assert type(loaded) is Parser
+        assert "_compiled" not in vars(loaded)
+        assert loaded.parse(self.string) == expected
+        assert loaded._compiled is _compile_format(self.fmt)
+
+    def test_pickle_pinned_parser(self):
+        import pickle
+
+        loaded = pickle.loads(pickle.dumps(Parser(self.fmt, pin=True)))
+        assert loaded._pinned
+
+    def test_pickle_compiled_format(self):
+        import pickle
+        from functools import partial
+
+        from trollsift.parser import _compile_format
+
+        compiled = _compile_format(self.fmt)
+        compiled.parse(self.string)
+        loaded_parse = pickle.loads(pickle.dumps(partial(compiled.parse, full_match=True)))
+        assert loaded_parse.func.__self__ is compiled
+        assert loaded_parse(self.string) == compiled.parse(self.string)
+
+    def test_pickle_pattern_set(self):
+        import pickle
+
+        patterns = PatternSet([self.fmt, "{platform}_{time:%Y%m%d}.nc"])
+        loaded = pickle.loads(pickle.dumps(patterns))
+        assert loaded.fmts == patterns.fmts
+        assert loaded.match("noaa19_20140212.nc") == patterns.match("noaa19_20140212.nc")
+
+
+class TestThreads:
+    """Test using parsers from several threads at once."""
+
+    fmts = [
+        "hrpt_{platform:4s}{platnum:2s}_{time:%Y%m%d_%H%M}_{orbit:05d}.l1b",
+        "{platform}_{time:%Y%m%d}_{channel}_{band:02d}.nc",
+        "{a}_{b}_{a}.txt",
+    ]
+
+    def _run_in_threads(self, func, nthreads=8, repeat=50):
+        from concurrent.futures import ThreadPoolExecutor
+
+        barrier = threading.Barrier(nthreads)
+
+        def _run(_):
+            barrier.wait()
+            return [func() for _ in range(repeat)]
+
+        with ThreadPoolExecutor(nthreads) as executor:
+            return [result for results in executor.map(_run, range(nthreads)) for result in results]
+
+    def test_compile_concurrently(self):
+        from trollsift.parser import _generate_data_for_format, purge
+
+        cases = []
+        for fmt in self.fmts:
+            keyvals = _generate_data_for_format(fmt)
+            cases.append((fmt, compose(fmt, keyvals), keyvals))
+
+        def _parse_all():
+            purge()
+            return [parse(fmt, stri) == keyvals and validate(fmt, stri) for fmt, stri, keyvals in cases]
+
+        assert all(all(result) for result in self._run_in_threads(_parse_all))
+
+    def test_shared_regex_formatter(self):
+        from trollsift.parser import RegexFormatter
+
+        regex_formatter = RegexFormatter()
+        expected = [RegexFormatter().format(fmt) for fmt in self.fmts]
+
+        def _format_all():
+            return [regex_formatter.format(fmt) for fmt in self.fmts]
+
+        assert all(result == expected for result in self._run_in_threads(_format_all))
+
+
+class TestStats:
+    """Test collecting statistics on parsing."""
+
+    fmt = "hrpt_{platform:4s}{platnum:2s}_{time:%Y%m%d_%H%M}_{orbit:05d}.l1b"
+    string = "hrpt_noaa19_20140212_1412_12345.l1b"
+
+    @pytest.fixture(autouse=True)
+    def stats(self):
+        from trollsift.parser import disable_stats, enable_stats
+
+        calls = []
+        enable_stats(callback=lambda *args: calls.append(args))
+        yield calls
+        disable_stats()
+
+    def test_stats(self, stats):
+        from trollsift.parser import get_stats
+
+        p = Parser(self.fmt)
+        assert p.stats is None
+        assert p.parse(self.string)["orbit"] == 12345
+        with pytest.raises(ValueError):
+            parse(self.fmt, "README.txt")
+        with pytest.raises(ValueError):
+            p.parse(self.string.replace("0212", "0231"))
+        assert p.parse_many([self.string, "README.txt"]) == [p.parse(self.string), None]
+        assert p.validate(self.string)
+        assert list(validate_many(self.fmt, [self.string, "README.txt"])) == [True, False]
+        fmt_stats = get_stats()[self.fmt]
+        assert (fmt_stats.calls, fmt_stats.failures) == (9, 4)
+        assert fmt_stats.match_time > 0
+        assert fmt_stats.convert_time > 0
+        assert p.stats.calls == 9
+        assert len(stats) == 9
+        assert [call[:2] for call in stats[:3]] == [(self.fmt, False), (self.fmt, True), (self.fmt, True)]
+        assert stats[1][3] == 0.0
+
+    def test_stats_are_kept_when_disabled(self):
+        from trollsift.parser import disable_stats, enable_stats, get_stats
+
+        p = Parser(self.fmt)
+        p.parse(self.string)
+        disable_stats()
+        p.parse(self.string)
+        assert p.stats.calls == 1
+        enable_stats()
+        assert get_stats() == {}
+
+
+class TestPatternSet:
+    """Test matching strings against several formats at once."""
+
+    fmts = [
+        "hrpt_{platform:4s}{platnum:2s}_{time:%Y%m%d_%H%M}_{orbit:05d}.l1b",
+        "{platform}_{time:%Y%m%d}.nc",
+        "hrpt_{platform_and_num}_{time:%Y%m%d_%H%M}_{orbit}.l1b",
+        "{directory}/{platform:4s}{platnum:2s}_{time:%Y%m%d}.nc",
+        "{version:1s}/data_{version:1s}.tif",
+        "README.txt",
+    ]
+
+    def test_match(self):
+        patterns = PatternSet(self.fmts)
+        assert len(patterns) == len(self.fmts)
+        assert patterns.match("hrpt_noaa16_20140210_1004_69022.l1b") == (
+            self.fmts[0],
+            {"platform": "noaa", "platnum": "16", "time": dt.datetime(2014, 2, 10, 10, 4), "orbit": 69022},
+        )
+        assert patterns.match("hrpt_noaa_16_20140210_1004_69022.l1b") == (
+            self.fmts[2],
+            {"platform_and_num": "noaa_16", "time": dt.datetime(2014, 2, 10, 10, 4), "orbit": "69022"},
+        )
+        assert patterns.match("mydir/noaa16_20140210.nc") == (
+            self.fmts[1],
+            {"platform": "mydir/noaa16", "time": dt.datetime(2014, 2, 10)},
+        )
+        assert patterns.match("1/data_1.tif") == (self.fmts[4], {"version": "1"})
+        assert patterns.match("README.txt") == (self.fmts[5], {})
+
+    def test_no_match(self):
+        patterns = PatternSet(self.fmts)
+        assert patterns.match("1/data_2.tif") is None
+        assert patterns.match("hrpt_noaa16_20140210_1004_69022.l1b.bak") is None
+        assert patterns.match_all("README") == []
+
+    def test_match_same_as_parse(self):
+        """Test that strings matching but failing conversion are handled like parse does."""
+        patterns = PatternSet(["{platform}_{time:%Y%m%d}.nc", "{platform}_{date}.nc"])
+        assert patterns.match("noaa16_20141310.nc") == (
+            "{platform}_{date}.nc",
+            {"platform": "noaa16", "date": "20141310"},
+        )
+        assert patterns.match_all("noaa16_20141310.nc") == [
+            ("{platform}_{date}.nc", {"platform": "noaa16", "date": "20141310"})
+        ]
+        assert patterns.match("noaa16_20141210.nc\n") == (
+            "{platform}_{time:%Y%m%d}.nc",
+            parse("{platform}_{time:%Y%m%d}.nc", "noaa16_20141210.nc\n"),
+        )
+
+    def test_match_all(self):
+        patterns = PatternSet(self.fmts)
+        matches = patterns.match_all("hrpt_noaa16_20140210_1004_69022.l1b")
+        assert [fmt for fmt, _keyvals in matches] == [self.fmts[0], self.fmts[2]]
+        assert matches[1][1] == {
+            "platform_and_num": "noaa16",
+            "time": dt.datetime(2014, 2, 10, 10, 4),
+            "orbit": "69022",
+        }
+        matches = patterns.match_all("mydir/noaa16_20140210.nc")
+        assert matches == [
+            (self.fmts[1], {"platform": "mydir/noaa16", "time": dt.datetime(2014, 2, 10)}),
+            (
+                self.fmts[3],
+                {"directory": "mydir", "platform": "noaa", "platnum": "16", "time": dt.datetime(2014, 2, 10)},
+            ),
+        ]
+
+
+class TestGlobifyWindow:
+    """Test making glob patterns for the strings of a time window."""
+
+    fmt = "hrpt_{platform:4s}{platnum:2s}_{time:%Y%m%d_%H%M}.l1b"
+
+    def test_globify_window(self):
+        patterns = Parser(self.fmt).globify_window(
+            "time", dt.datetime(2013, 12, 31, 22, 10), dt.datetime(2015, 3, 2, 0, 1), keyvals={"platnum": "19"}
+        )
+        assert patterns == [
+            "hrpt_????19_20131231_22??.l1b",
+            "hrpt_????19_20131231_23??.l1b",
+            "hrpt_????19_2014????_????.l1b",
+            "hrpt_????19_201501??_????.l1b",
+            "hrpt_????19_201502??_????.l1b",
+            "hrpt_????19_20150301_????.l1b",
+            "hrpt_????19_20150302_00??.l1b",
+        ]
+
+    @pytest.mark.parametrize("resolution", ["Y", "m", "d", "H", "M"])
+    def test_globify_window_matches_window(self, resolution):
+        """Test that the patterns match the strings of the window, and not the ones of other periods."""
+        import fnmatch
+
+        parser = Parser(self.fmt)
+        start, end = dt.datetime(2014, 2, 27, 21, 47), dt.datetime(2014, 3, 2, 3, 12)
+        patterns = parser.globify_window("time", start, end, resolution=resolution, char_classes=True)
+        widening = {"Y": dt.timedelta(days=366), "m": dt.timedelta(days=31), "d": dt.timedelta(days=1)}
+        margin = widening.get(resolution, dt.timedelta(hours=1))
+        for minutes in range(-3 * 24 * 60, 7 * 24 * 60, 7):
+            time = start + dt.timedelta(minutes=minutes)
+            composed = parser.compose({"platform": "noaa", "platnum": "19", "time": time})
+            matches = [pattern for pattern in patterns if fnmatch.fnmatchcase(composed, pattern)]
+            if start <= time < end:
+                assert len(matches) == 1
+            elif not start - margin < time < end + margin:
+                assert matches == []
+
+    def test_globify_window_day_of_year(self):
+        patterns = Parser("{time:%Y%j}_{orbit:05d}.dat").globify_window(
+            "time", dt.datetime(2014, 1, 30, 12), dt.datetime(2014, 3, 1)
+        )
+        assert len(patterns) == 30
+        assert patterns[0] == "2014030_?????.dat"
+        assert patterns[-1] == "2014059_?????.dat"
+
+    def test_globify_window_resolution(self):
+        patterns = Parser(self.fmt).globify_window(
+            "time", dt.datetime(2014, 2, 10, 12, 12), dt.datetime(2014, 2, 11, 0, 1), resolution="d"
+        )
+        assert patterns == ["hrpt_??????_20140210_????.l1b", "hrpt_??????_20140211_????.l1b"]
+        patterns = Parser(self.fmt).globify_window(
+            "time", dt.datetime(2014, 2, 10, 12, 12), dt.datetime(2014, 2, 10, 12, 14), resolution="S"
+        )
+        assert patterns == ["hrpt_??????_20140210_1212.l1b", "hrpt_??????_20140210_1213.l1b"]
+
+    def test_globify_window_errors(self):
+        with pytest.raises(ValueError):
+            Parser(self.fmt).globify_window("platform", dt.datetime(2014, 2, 10), dt.datetime(2014, 2, 11))
+        with pytest.raises(ValueError):
+            Parser(self.fmt).globify_window(
+                "time", dt.datetime(2014, 2, 10), dt.datetime(2014, 2, 11), resolution="hour"
+            )
+
+
+class TestFileIndex:
+    """Test selecting paths by value in an index of parsed paths."""
+
+    fmt = "hrpt_{platform:4s}{platnum:2s}_{time:%Y%m%d_%H%M}_{orbit:05d}.l1b"
+    paths = [
+        "hrpt_noaa19_20140210_1004_12345.l1b",
+        "hrpt_noaa18_20140210_1012_55555.l1b",
+        "README.txt",
+        "hrpt_noaa19_20140210_1148_12346.l1b",
+        "hrpt_noaa19_20140210_0900_12344.l1b",
+        "hrpt_noaa18_20140210_1004_55554.l1b",
+    ]
+
+    @pytest.fixture(params=[True, False], ids=["numpy", "lists"])
+    def index(self, request, monkeypatch):
+        from trollsift.parser import FileIndex
+
+        if request.param:
+            pytest.importorskip("numpy")
+        else:
+            import trollsift.parser
+
+            monkeypatch.setattr(trollsift.parser, "_get_numpy", lambda: None)
+        return FileIndex(Parser(self.fmt), iter(self.paths))
+
+    def test_large_integers(self, index):
+        from trollsift.parser import FileIndex
+
+        large = 123456789012345678901234
+        index = FileIndex(Parser("{id:d}.txt"), [f"{large}.txt", "1.txt", "5.txt"])
+        assert index.select({"id": large}) == [f"{large}.txt"]
+        assert index.select({"id": (2, None)}) == [f"{large}.txt", "5.txt"]
+
+    def test_len(self, index):
+        assert len(index) == 5
+
+    def test_select_value(self, index):
+        assert index.select({"platnum": "18"}) == [self.paths[1], self.paths[5]]
+        assert index.select({"orbit": 12346}) == [self.paths[3]]
+        assert index.select({"time": dt.datetime(2014, 2, 10, 10, 4)}) == [self.paths[0], self.paths[5]]
+        assert index.select({"platnum": "17"}) == []
+
+    def test_select_range(self, index):
+        start, end = dt.datetime(2014, 2, 10, 10), dt.datetime(2014, 2, 10, 11, 48)
+        assert index.select({"time": (start, end)}) == [self.paths[0], self.paths[1], self.paths[5]]
+        assert index.select({"time": (start, None)}) == [self.paths[0], self.paths[1], self.paths[3], self.paths[5]]
+        assert index.select({"orbit": (None, 12346)}) == [self.paths[0], self.paths[4]]
+        assert index.select({"time": (end, start)}) == []
+
+    def test_select_several(self, index):
+        keyvals = {"platnum": "19", "time": (dt.datetime(2014, 2, 10, 9), dt.datetime(2014, 2, 10, 11))}
+        assert index.select(keyvals) == [self.paths[0], self.paths[4]]
+        assert index.select({"platnum": "18", "orbit": 12345}) == []
+        assert index.select({}) == [path for path in self.paths if path != "README.txt"]
+
+    def test_select_unknown_key(self, index):
+        with pytest.raises(ValueError):
+            index.select({"channel": "4"})
+
+    def test_empty(self):
+        from trollsift.parser import FileIndex
+
+        index = FileIndex(Parser(self.fmt), ["README.txt"])
+        assert len(index) == 0
+        assert index.select({"platnum": "19", "time": (dt.datetime(2014, 2, 10), None)}) == []
+
+
 class TestCompose:
     """Test routines related to `compose` methods."""
 
@@ -429,6 +1469,28 @@ class TestCompose:
             new_str = compose("{a!X}", key_vals, allow_partial=allow_partial)
         assert new_str == "this Is A-Test b_test c test"
 
+    @pytest.mark.parametrize(
+        ("fmt", "keyvals", "expected"),
+        [
+            ("{a:4s}_{b:03d}{{{c!H}}}", {"a": "ab", "b": 7, "c": "x-y"}, "ab  _007{XY}"),
+            ("{a:%Y%m%d}.{b:5.2f}", {"a": dt.datetime(2014, 2, 10), "b": 1.234}, "20140210. 1.23"),
+            ("{a.year}_{b[0]}", {"a": dt.datetime(2014, 2, 10), "b": "xyz"}, "2014_x"),
+            ("{a:{b}}", {"a": "x", "b": ">3"}, "  x"),
+            ("no fields", {}, "no fields"),
+        ],
+    )
+    def test_compose_same_as_format(self, fmt, keyvals, expected):
+        """Test that composing gives the same result as formatting with the StringFormatter."""
+        from trollsift.parser import StringFormatter
+
+        assert compose(fmt, keyvals) == expected
+        assert Parser(fmt).compose(keyvals) == expected
+        assert StringFormatter().format(fmt, **keyvals) == expected
+
+    def test_compose_positional_fields(self):
+        with pytest.raises(IndexError):
+            compose("{}_{}", {})
+
     def test_default_compose_is_strict(self):
         """Make sure the default compose call does not accept partial composition."""
         fmt = "{foo}_{bar}.qux"
@@ -465,6 +1527,33 @@ class TestCompose:
         """Test that partial compose leaves the input untouched if no keyvals at all."""
         assert compose(fmt=original_fmt, keyvals={}, allow_partial=True) == original_fmt
 
+    @pytest.mark.parametrize(
+        ("keyvals", "expected"),
+        [
+            ({"a": dt.datetime(2014, 2, 10)}, "{{lit}}_2014_{b!u}_{c[0]:>3}"),
+            ({"b": "x-y", "c": "abc"}, "{{lit}}_{a.year}_X-Y_  a"),
+            ({"a": dt.datetime(2014, 2, 10), "b": "x-y", "c": "abc", "d": "unused"}, "{{lit}}_2014_X-Y_  a"),
+        ],
+    )
+    def test_partial_compose_fields_with_conversions_and_accessors(self, keyvals, expected):
+        """Test partial compose of fields using conversions, attributes and items."""
+        fmt = "{{{{lit}}}}_{a.year}_{b!u}_{c[0]:>3}"
+        assert compose(fmt, keyvals, allow_partial=True) == expected
+        assert Parser(fmt).compose(keyvals, allow_partial=True) == expected
+
+    def test_partial_compose_reuses_compiled_formats(self):
+        """Test that the partial format is only compiled once per set of provided parameters."""
+        from trollsift.parser import _compile_format
+
+        fmt = "{platform}/{start_time:%Y%m%d}/{channel}_{start_time:%H%M}.dat"
+        compiled = _compile_format(fmt)
+        for platform in ("noaa18", "noaa19"):
+            composed = compose(fmt, {"platform": platform, "other": 1}, allow_partial=True)
+            assert composed == platform + "/{start_time:%Y%m%d}/{channel}_{start_time:%H%M}.dat"
+        composed = compose(fmt, {"start_time": dt.datetime(2014, 2, 10, 10, 4)}, allow_partial=True)
+        assert composed == "{platform}/20140210/{channel}_1004.dat"
+        assert list(compiled.partial_formats) == [frozenset(["platform"]), frozenset(["start_time"])]
+
     def test_that_some_invalid_fmt_can_confuse_partial_compose(self):
         """Test that a fmt with a weird char can confuse partial compose."""
         fmt = "{foo?}_{bar}_{foo}.qux"
@@ -472,6 +1561,73 @@ class TestCompose:
             _ = compose(fmt=fmt, keyvals={}, allow_partial=True)
 
 
+class TestComposeExpansion:
+    """Test the lazy expansion of formats over many parameter values."""
+
+    def test_compose_product(self):
+        """Test composing all the combinations of the given values, the first parameter changing slowest."""
+        p = Parser("{platform}_{channel}_{segment:02d}.dat")
+        composed = p.compose_product(
+            {"platform": ["noaa18", "noaa19"], "segment": range(1, 3)}, keyvals={"channel": "ch4"}
+        )
+        assert list(composed) == [
+            "noaa18_ch4_01.dat",
+            "noaa18_ch4_02.dat",
+            "noaa19_ch4_01.dat",
+            "noaa19_ch4_02.dat",
+        ]
+
+    def test_compose_product_is_lazy(self):
+        """Test that the first parameter values are only read when needed."""
+        from itertools import count, islice
+
+        p = Parser("{orbit:05d}_{channel}.dat")
+        composed = p.compose_product({"orbit": count(1), "channel": ["ch1", "ch2"]})
+        assert list(islice(composed, 3)) == ["00001_ch1.dat", "00001_ch2.dat", "00002_ch1.dat"]
+
+    def test_compose_product_without_values(self):
+        """Test that composing without values gives a single string."""
+        p = Parser("{platform}.dat")
+        assert list(p.compose_product({}, keyvals={"platform": "noaa19"})) == ["noaa19.dat"]
+
+    def test_compose_product_missing_value(self):
+        """Test that composing with missing parameters fails like compose."""
+        p = Parser("{platform}_{channel}.dat")
+        with pytest.raises(KeyError):
+            list(p.compose_product({"platform": ["noaa19"]}))
+
+    def test_compose_range(self):
+        """Test composing over a half-open range of times."""
+        p = Parser("{platform}_{start_time:%Y%m%d_%H%M}_{channel}.dat")
+        composed = p.compose_range(
+            "start_time",
+            dt.datetime(2014, 2, 10, 23, 30),
+            dt.datetime(2014, 2, 11, 0, 30),
+            dt.timedelta(minutes=30),
+            values={"channel": ["ch1", "ch2"]},
+            keyvals={"platform": "noaa19"},
+        )
+        assert list(composed) == [
+            "noaa19_20140210_2330_ch1.dat",
+            "noaa19_20140210_2330_ch2.dat",
+            "noaa19_20140211_0000_ch1.dat",
+            "noaa19_20140211_0000_ch2.dat",
+        ]
+
+    def test_compose_range_empty(self):
+        """Test that an empty time range gives no strings."""
+        p = Parser("{start_time:%Y%m%d}.dat")
+        start_time = dt.datetime(2014, 2, 10)
+        assert list(p.compose_range("start_time", start_time, start_time, dt.timedelta(days=1))) == []
+
+    @pytest.mark.parametrize("step", [dt.timedelta(0), dt.timedelta(days=-1)])
+    def test_compose_range_bad_step(self, step):
+        """Test that a non positive time step is refused."""
+        p = Parser("{start_time:%Y%m%d}.dat")
+        with pytest.raises(ValueError):
+            p.compose_range("start_time", dt.datetime(2014, 2, 10), dt.datetime(2014, 2, 12), step)
+
+
 class TestParserFixedPoint:
     """Test parsing of fixed point numbers."""
 